@@ -0,0 +1,45 @@
+import re
+import sys
+import subprocess
+
+# Start-up cost of `import rodio`, measured with `python -X importtime`
+# usage: benchimporttime.py [budget in ms, 25 by default]
+
+BUDGET_MS = float(sys.argv[1]) if len(sys.argv) > 1 else 25
+RUNS = 7
+# none of these should load before a loop is actually created
+HEAVY = ['asyncio', 'multiprocessing', 'dill', 'uvloop', 'concurrent.futures']
+
+STATEMENTS = {
+    'import rodio': 'import rodio',
+    'rodio.RodioThread': 'import rodio; rodio.RodioThread',
+    'rodio.EventLoop': 'import rodio; rodio.EventLoop',
+}
+
+
+def measure(statement):
+    # cumulative microseconds per top level import, and every module imported
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, check=True).stderr
+    rows = re.findall(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)', stderr)
+    total = sum(int(cumulative)
+                for (cumulative, indent, _) in rows if len(indent) == 1)
+    return [total, {module for (_, _, module) in rows}]
+
+
+failed = False
+for (label, statement) in STATEMENTS.items():
+    # the fastest of a few runs, the rest is noise from the machine
+    samples = [measure(statement) for _ in range(RUNS)]
+    best = min(total for (total, _) in samples) / 1000
+    print(f"{label:<20} | {best:8.2f}ms")
+    if label == 'import rodio':
+        loaded = [module for module in HEAVY if module in samples[0][1]]
+        if loaded:
+            print(f"  `import rodio` loaded {', '.join(loaded)} eagerly")
+            failed = True
+        if best > BUDGET_MS:
+            print(f"  over the {BUDGET_MS}ms budget")
+            failed = True
+
+sys.exit(1 if failed else 0)
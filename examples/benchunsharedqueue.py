@@ -0,0 +1,40 @@
+import time
+import queue
+from rodio import EventQueue
+
+# Per tick overhead of an unshared EventQueue against a bare queue.Queue
+
+TICKS = 100000
+
+
+def noop(i):
+    pass
+
+
+eventqueue = EventQueue(shared_queue=False)
+start = time.perf_counter()
+for i in range(TICKS):
+    eventqueue.push(noop, (i,))
+eventqueue.push(eventqueue.end)
+pushed = time.perf_counter()
+eventqueue.start()
+drained = time.perf_counter()
+print(f"EventQueue  | push {(pushed - start) / TICKS * 1e6:.2f}us"
+      f" | drain {(drained - pushed) / TICKS * 1e6:.2f}us"
+      f" | total {(drained - start) / TICKS * 1e6:.2f}us per tick")
+
+barequeue = queue.Queue()
+start = time.perf_counter()
+for i in range(TICKS):
+    barequeue.put((noop, (i,)))
+pushed = time.perf_counter()
+while True:
+    try:
+        [fn, args] = barequeue.get_nowait()
+    except queue.Empty:
+        break
+    fn(*args)
+drained = time.perf_counter()
+print(f"queue.Queue | push {(pushed - start) / TICKS * 1e6:.2f}us"
+      f" | drain {(drained - pushed) / TICKS * 1e6:.2f}us"
+      f" | total {(drained - start) / TICKS * 1e6:.2f}us per tick")
@@ -0,0 +1,91 @@
+import os
+import time
+import signal
+import tempfile
+from rodio import EventLoop, EventLoopPool
+
+# the loop's process is gone after a crash, what it ran is tracked on disk
+workdir = tempfile.mkdtemp(prefix='rodioalo')
+crashed = os.path.join(workdir, 'crashed')
+journal = os.path.join(workdir, 'journal')
+
+
+def record(index):
+    with open(journal, 'a') as file:
+        file.write(f'{index}\n')
+    return index * 2
+
+
+def crash():
+    # only the first run crashes, the replayed one goes through
+    if not os.path.exists(crashed):
+        open(crashed, 'w').close()
+        os.kill(os.getpid(), signal.SIGKILL)
+
+
+respawns = []
+loop = EventLoop(at_least_once=True, autostart=False)
+loop.on('respawn', respawns.append)
+loop.register(record)
+loop.register(crash)
+loop.start()
+futures = [loop.submit(record, index) for index in range(3)]
+loop.nextTick(crash)
+futures += [loop.submit(record, index) for index in range(3, 6)]
+for index in range(6, 8):
+    loop.nextTick(record, index)
+results = [future.result(timeout=30) for future in futures]
+loop.scheduleExit()
+loop.join()
+
+with open(journal) as file:
+    ran = sorted(map(int, file.read().split()))
+for path in (crashed, journal):
+    os.remove(path)
+os.rmdir(workdir)
+print("respawns", respawns, "ran", ran)
+assert results == [index * 2 for index in range(6)], "every submit() should resolve after the crash"
+assert len(respawns) == 1, "the crashed loop should have been respawned once"
+# ticks taken but not acknowledged before the crash run again, none are lost
+assert sorted(set(ran)) == list(range(8)), "a tick was lost in the crash"
+assert loop._process.exitcode == 0, loop._process.exitcode
+
+# a pool worker replaced after a crash is wired back into the pool, counted and stealing like before
+
+
+def hog(seconds):
+    time.sleep(seconds)
+
+
+def where(index):
+    time.sleep(0.01)
+    return os.getpid()
+
+
+workdir = tempfile.mkdtemp(prefix='rodioalo')
+crashed = os.path.join(workdir, 'crashed')
+pool = EventLoopPool(2, at_least_once=True, drain_batch=1)
+for fn in (crash, hog, where):
+    pool.register(fn)
+[replaced, busy] = pool._workers
+replaced.on('respawn', respawns.append)
+replaced.nextTick(crash)
+pool.start()
+started = time.monotonic()
+while len(respawns) < 2 and time.monotonic() - started < 10:
+    time.sleep(0.05)
+assert len(respawns) == 2, "the crashed pool worker should have been respawned"
+executed = pool.stats()[0]['executed']
+busy.nextTick(hog, 1.5)
+futures = [pool.submit(where, index) for index in range(20)]
+pids = {future.result(timeout=30) for future in futures}
+stats = pool.stats()
+pool.scheduleExit()
+pool.join()
+os.remove(crashed)
+os.rmdir(workdir)
+print("respawned worker", (stats[0]['executed'], stats[0]['stolen']))
+assert replaced._process.pid in pids, "the respawned worker should run ticks"
+assert stats[0]['executed'] > executed, "the respawned worker's ticks should still be counted"
+assert stats[0]['stolen'] > 0, "the respawned worker should steal from its peers"
+print("at least once ok")
@@ -0,0 +1,75 @@
+import time
+import queue
+import threading
+from rodio import EventLoop
+from rodio.internals.completion import get_watcher
+
+
+def stall(seconds, payload=None):
+    time.sleep(seconds)
+
+
+def noop():
+    pass
+
+
+events = []
+low = threading.Event()
+
+
+def on_low():
+    # relayed from the watcher thread
+    events.append('lowWater')
+    low.set()
+
+
+loop = EventLoop(maxsize=4)
+loop.register(stall)
+loop.register(noop)
+loop.on('highWater', lambda: events.append('highWater'))
+loop.on('lowWater', on_low)
+loop.nextTick(stall, 0.6)
+# the loop takes ticks off the queue a batch at a time, once it's stalled nothing more is taken
+time.sleep(0.2)
+try:
+    for _ in range(5):
+        loop.nextTick(noop, block=False)
+    raise AssertionError("a full queue should refuse a non-blocking push")
+except queue.Full:
+    pass
+assert events == ['highWater'], events
+# a blocking push waits for the loop to make room
+started = time.monotonic()
+loop.nextTick(noop, timeout=5)
+assert time.monotonic() - started > 0.1, "the push should have waited on the full queue"
+assert low.wait(5), "lowWater should fire once the queue drains"
+assert events == ['highWater', 'lowWater'], events
+loop.scheduleExit()
+loop.join()
+
+# a single tick bigger than max_bytes still goes through on an empty queue, the next one waits
+loop = EventLoop(max_bytes=1 << 16)
+loop.register(stall)
+loop.nextTick(stall, 0.5)
+time.sleep(0.2)
+loop.nextTick(stall, 0, b'x' * (1 << 17))
+try:
+    loop.nextTick(stall, 0, b'x' * (1 << 17), timeout=0.05)
+    raise AssertionError("a queue over its bytes bound should time out a push")
+except queue.Full:
+    pass
+loop.scheduleExit()
+loop.join()
+
+# relaying the watermarks holds on to a loop only for as long as it runs
+for _ in range(10):
+    loop = EventLoop(maxsize=2)
+    loop.register(stall)
+    loop.register(noop)
+    loop.nextTick(stall, 0.05)
+    for _ in range(4):
+        loop.nextTick(noop)
+    loop.scheduleExit()
+    loop.join()
+assert not get_watcher()._listeners, "ended loops should not be held by the watcher"
+print("backpressure ok")
@@ -0,0 +1,44 @@
+import time
+from rodio import EventLoop, get_current_loop
+
+# what the loop ran, with how many ticks were still queued when each of them ran
+seen = []
+
+
+def stall(seconds):
+    time.sleep(seconds)
+
+
+def record(index):
+    seen.append((index, get_current_loop()._queue._lanes.qsize()))
+
+
+def report():
+    return list(seen)
+
+
+def batches(drain_batch):
+    loop = EventLoop(drain_batch=drain_batch)
+    loop.register(stall)
+    loop.register(record)
+    loop.register(report)
+    loop.nextTick(stall, 0.5)
+    # the loop is stalled while these queue up, so every batch it takes afterwards is a full one
+    time.sleep(0.2)
+    for index in range(100):
+        loop.nextTick(record, index)
+    ran = loop.submit(report).result(timeout=30)
+    loop.scheduleExit()
+    loop.join()
+    assert [index for (index, _) in ran] == list(range(100)), "ticks should run once each, in order"
+    # ticks taken in a single batch all see the same backlog behind them
+    sizes = [size for (_, size) in ran]
+    return [sizes.count(size) for size in sorted(set(sizes), reverse=True)]
+
+
+counts = batches(10)
+print("batches of", counts)
+assert counts == [10] * 10, "the loop should take drain_batch ticks per batch"
+counts = batches(1)
+assert counts == [1] * 100, "a drain_batch of 1 should take the ticks one at a time"
+print("batch drain ok")
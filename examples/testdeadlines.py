@@ -0,0 +1,125 @@
+import time
+import asyncio
+import concurrent.futures
+from rodio import EventLoop
+
+
+def slow(seconds):
+    time.sleep(seconds)
+
+
+def ident(value):
+    return value
+
+
+async def asleep(seconds):
+    await asyncio.sleep(seconds)
+    return seconds
+
+
+def outcome(future):
+    try:
+        return future.result(timeout=10)
+    except (asyncio.CancelledError, concurrent.futures.CancelledError):
+        return 'cancelled'
+    except TimeoutError:
+        return 'expired'
+
+
+async def raises():
+    # a TimeoutError of the tick's own is an error like any other, not an expiry
+    raise TimeoutError("raised by the tick")
+
+
+for inflight in (1, 4):
+    loop = EventLoop(autostart=False, max_inflight=inflight)
+    for fn in (slow, ident, asleep, raises):
+        loop.register(fn)
+    loop.start()
+    # keep the loop busy so the ticks below are still queued when they are cancelled or go stale
+    loop.nextTick(slow, 0.3)
+    stale = loop.submit(ident, 'stale', ttl=0.1)
+    fresh = loop.submit(ident, 'fresh', ttl=5)
+    handle = loop.nextTick(ident, 'cancelled')
+    cancelled = loop.submit(ident, 'cancelled')
+    assert handle.cancel(), "a queued tick should be cancellable"
+    assert not handle.cancel(), "a tick can only be cancelled once"
+    assert cancelled.cancel(), "a queued submit() should be cancellable"
+    bounded = loop.submit(asleep, 1, ttl=0.5)
+    unbounded = loop.submit(asleep, 0.05, ttl=2)
+    own = loop.submit(raises)
+    results = [outcome(future) for future in (stale, fresh, cancelled, bounded, unbounded)]
+    print(inflight, results)
+    assert results == ['expired', 'fresh', 'cancelled', 'expired', 0.05], results
+    try:
+        own.result(timeout=10)
+        raise AssertionError("the tick's own TimeoutError should reach its future")
+    except TimeoutError as error:
+        assert str(error) == "raised by the tick", error
+    # an expired tick doesn't take the loop down with it, and a finished one can't be cancelled
+    late = loop.submit(ident, 'alive')
+    assert late.result(timeout=10) == 'alive'
+    assert not late.cancel(), "a finished tick can't be cancelled"
+    loop.scheduleExit()
+    loop.join()
+    assert loop._process.exitcode == 0, loop._process.exitcode
+
+
+def late(value):
+    return value * 2
+
+
+def explode():
+    raise ValueError("can't be decoded within the loop")
+
+
+class Undecodable:
+    def __reduce__(self):
+        return (explode, ())
+
+
+# a callable registered once the loop runs ships its definition with its first tick,
+# which still reaches the loop when that tick is dropped
+loop = EventLoop()
+loop.nextTick(slow, 0.3)
+loop.register(late)
+first = loop.submit(late, 1, ttl=0.1)
+second = loop.submit(late, 2)
+assert outcome(first) == 'expired'
+assert second.result(timeout=10) == 4, "the callable's definition was lost with the dropped tick"
+# a tick that fails to decode only fails its own future
+broken = loop.submit(late, Undecodable())
+try:
+    broken.result(timeout=10)
+    raise AssertionError("an undecodable tick should fail its future")
+except ValueError:
+    pass
+assert loop.submit(late, 3).result(timeout=10) == 6, "the loop should carry on past an undecodable tick"
+loop.scheduleExit()
+loop.join()
+assert loop._process.exitcode == 0, loop._process.exitcode
+
+# an unshared loop takes no ticks once started, but those queued before can still be cancelled from here
+ran = []
+
+
+def note(tag):
+    ran.append(tag)
+
+
+def report():
+    return list(ran)
+
+
+loop = EventLoop(shared_queue=False, autostart=False, drain_batch=1)
+loop.nextTick(slow, 0.5)
+handle = loop.nextTick(note, 'cancelled')
+loop.nextTick(note, 'kept')
+notes = loop.submit(report)
+loop.start()
+time.sleep(0.2)
+assert handle.cancel(), "a tick the loop hasn't taken yet should be cancellable"
+assert notes.result(timeout=10) == ['kept'], "a cancel reported to hold should hold"
+loop.terminate()
+loop.join()
+print("deadlines ok")
@@ -0,0 +1,39 @@
+import os
+import sys
+import subprocess
+from rodio import EventLoop, EventQueue
+from rodio.internals.debug import LogDebugger
+
+
+class Loud:
+    # formatting this fails, so a log call that formats it shows
+    def __str__(self):
+        raise AssertionError("a disabled logger formatted its arguments")
+
+
+# with --DEBUG off, methods stay as they are and log calls format nothing
+assert EventLoop.submit.__code__.co_name == 'submit', "debug wrappers shouldn't be installed"
+assert EventQueue.push.__code__.co_name == 'push'
+logger = LogDebugger('rodio.test.debugoff')
+assert not logger.enabled
+logger.log('loud', Loud())
+
+# with --DEBUG on, the wrappers log every call and the records get written out
+script = '''
+from rodio import EventLoop
+assert EventLoop.submit.__code__.co_name != 'submit', "debug wrappers should be installed"
+def square(value):
+    return value * value
+loop = EventLoop()
+assert loop.submit(square, 4).result(timeout=10) == 16
+loop.scheduleExit()
+loop.join()
+'''
+output = subprocess.run([sys.executable, '-c', script, '--DEBUG'], capture_output=True, text=True,
+                        timeout=60, cwd=os.path.dirname(os.path.abspath(__file__)))
+assert output.returncode == 0, output.stderr
+lines = [line for line in output.stdout.splitlines() if 'DEBUG' in line]
+assert any('submit' in line for line in lines), "calls made under --DEBUG should be logged"
+assert any('_startIterator' in line for line in lines), "the loop's own records should be flushed too"
+print(f"{len(lines)} records under --DEBUG")
+print("debug off ok")
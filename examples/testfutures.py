@@ -0,0 +1,60 @@
+import time
+import asyncio
+import concurrent.futures
+from rodio import EventLoop
+
+
+def square(value):
+    return value * value
+
+
+def negate(value):
+    return -value
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+async def later(value):
+    await asyncio.sleep(0.01)
+    return value
+
+
+def stall(seconds):
+    time.sleep(seconds)
+
+
+loop = EventLoop()
+future = loop.submit(square, 7)
+assert isinstance(future, concurrent.futures.Future)
+assert future.result(timeout=10) == 49
+assert loop.submit(later, 'async').result(timeout=10) == 'async', "coroutine results come back too"
+assert loop.submit([square, negate], 3).result(timeout=10) == [9, -3], \
+    "callables queued together return a list"
+futures = [loop.submit(square, index) for index in range(200)]
+assert [future.result(timeout=30) for future in futures] == [index * index for index in range(200)]
+
+error = loop.submit(fail, 'boom').exception(timeout=10)
+assert isinstance(error, ValueError) and str(error) == 'boom', repr(error)
+assert any('in fail' in note for note in getattr(error, '__notes__', [])), \
+    "the remote traceback should come along as a note"
+
+
+async def main():
+    return await asyncio.gather(*(loop.submit_async(square, index) for index in range(5)))
+
+assert asyncio.run(main()) == [0, 1, 4, 9, 16]
+loop.scheduleExit()
+loop.join()
+
+# futures still outstanding when the loop dies fail instead of hanging
+loop = EventLoop()
+loop.submit(square, 0).result(timeout=10)
+loop.nextTick(stall, 5)
+stranded = loop.submit(square, 1)
+time.sleep(0.2)
+loop.kill()
+error = stranded.exception(timeout=10)
+assert isinstance(error, RuntimeError), repr(error)
+print("futures ok")
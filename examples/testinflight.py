@@ -0,0 +1,51 @@
+import time
+import asyncio
+from rodio import EventLoop
+
+# [running now, most ever running at once]
+running = [0, 0]
+
+
+async def nap(index, seconds):
+    running[0] += 1
+    running[1] = max(running)
+    await asyncio.sleep(seconds)
+    running[0] -= 1
+    return index
+
+
+def peak():
+    return running[1]
+
+
+def overlap(**options):
+    loop = EventLoop(**options)
+    loop.register(nap)
+    loop.register(peak)
+    started = time.monotonic()
+    futures = [loop.submit(nap, index, 0.3) for index in range(8)]
+    assert [future.result(timeout=30) for future in futures] == list(range(8))
+    elapsed = time.monotonic() - started
+    most = loop.submit(peak).result(timeout=10)
+    loop.scheduleExit()
+    loop.join()
+    return (most, elapsed)
+
+
+(most, elapsed) = overlap(max_inflight=4)
+print(f"max_inflight=4 ran {most} at once, {elapsed:.2f}s")
+assert most == 4, "up to max_inflight coroutine ticks should overlap"
+assert elapsed < 1.5, "8 ticks of 0.3s four at a time should take about two rounds"
+(most, elapsed) = overlap(max_inflight=4, ordered=True)
+assert most == 1, "ordered loops run one coroutine tick at a time"
+assert elapsed >= 2.4, "ordered ticks should not overlap"
+
+# an exit queued behind ticks still in flight waits for them to finish
+loop = EventLoop(max_inflight=4)
+loop.register(nap)
+futures = [loop.submit(nap, index, 0.3) for index in range(4)]
+loop.scheduleExit()
+loop.join()
+assert [future.result(timeout=10) for future in futures] == list(range(4)), \
+    "ticks in flight when the exit came should still complete"
+print("inflight ok")
@@ -0,0 +1,76 @@
+import os
+import sys
+import shutil
+import tempfile
+import importlib.util
+from rodio import EventLoop, get_running_loop
+from rodio import eventloop
+
+# each module records that it loaded and sets off a tick of its own
+SOURCE = '''
+import os
+from rodio import get_running_loop
+
+
+def record(event):
+    get_running_loop().__dict__.setdefault('log', []).append((event, {name!r}, os.getpid()))
+
+
+record('loaded')
+get_running_loop().nextTick(record, 'ticked')
+'''
+
+
+def report():
+    loop = get_running_loop()
+    return (loop.__dict__.get('log', []), sorted(loop._modules))
+
+
+def write(path, name):
+    with open(path, 'w') as file:
+        file.write(SOURCE.format(name=name))
+
+
+workdir = tempfile.mkdtemp(prefix='rodiomodules')
+paths = [os.path.join(workdir, f'{name}.py') for name in ('alpha', 'beta', 'gamma')]
+for path in paths:
+    write(path, os.path.basename(path)[:-3])
+
+loop = EventLoop('service')
+structs = loop.load_modules(paths, block=True)
+assert all(struct.exception() is None for struct in structs)
+(log, modules) = loop.submit(report).result(timeout=10)
+loop.scheduleExit()
+loop.join()
+assert modules == ['service', 'service-beta', 'service-gamma'], modules
+assert len({pid for (_, _, pid) in log}) == 1, "every module should load into the same loop"
+# none of the modules waits on the others, they're all loaded before any of their ticks run
+assert [event for (event, _, _) in log] == ['loaded'] * 3 + ['ticked'] * 3, log
+
+# modules are compiled once, other loops started from them reuse the code and __pycache__
+if not sys.dont_write_bytecode:
+    assert all(os.path.exists(importlib.util.cache_from_source(path)) for path in paths)
+cached = eventloop._code_cache[paths[0]][1]
+loop = EventLoop()
+loop.load_modules(paths[:1], block=True)
+assert eventloop._code_cache[paths[0]][1] is cached, "an unchanged module shouldn't be compiled again"
+loop.scheduleExit()
+loop.join()
+# ...until it changes
+write(paths[0], 'changed')
+os.utime(paths[0], ns=(0, os.stat(paths[0]).st_mtime_ns + 10 ** 9))
+loop = EventLoop()
+loop.load_modules(paths[:1], block=True)
+(log, _) = loop.submit(report).result(timeout=10)
+assert ('loaded', 'changed', loop._process.pid) in log, "a changed module should be recompiled"
+loop.scheduleExit()
+loop.join()
+
+loop = EventLoop(autostart=False)
+try:
+    loop.load_modules([os.path.join(workdir, 'missing.py')])
+    raise AssertionError("a missing module should fail to load right away")
+except FileNotFoundError:
+    pass
+shutil.rmtree(workdir)
+print("load modules ok")
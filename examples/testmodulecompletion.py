@@ -0,0 +1,56 @@
+import os
+import time
+import shutil
+import tempfile
+from rodio import EventLoop
+from rodio.internals.completion import get_watcher
+
+# a module that sets off a tick of its own, it's only complete once that ran too
+SOURCE = '''
+import time
+from rodio import get_running_loop
+
+def settle():
+    time.sleep(0.3)
+
+get_running_loop().nextTick(settle)
+'''
+
+workdir = tempfile.mkdtemp(prefix='rodiomodules')
+path = os.path.join(workdir, 'settling.py')
+broken = os.path.join(workdir, 'broken.py')
+with open(path, 'w') as file:
+    file.write(SOURCE)
+with open(broken, 'w') as file:
+    file.write("raise ValueError('broken on purpose')\n")
+
+events = []
+loop = EventLoop()
+struct = loop.load_module(path)
+struct.on('loaded', lambda: events.append(('loaded', time.monotonic())))
+struct.on('complete', lambda loop: events.append(('complete', time.monotonic())))
+assert struct.wait(10), "the module should complete"
+assert struct.done() and struct.result() is None
+loop.scheduleExit()
+loop.join()
+print("events", [name for (name, _) in events])
+assert [name for (name, _) in events] == ['loaded', 'complete'], events
+assert events[1][1] - events[0][1] >= 0.2, "completion should wait on the ticks the module set off"
+
+# a module that fails still completes, its future holds the error
+loop = EventLoop()
+struct = loop.load_module(broken)
+assert struct.wait(10), "a failed module should still complete"
+assert isinstance(struct.exception(), ValueError), struct.exception()
+loop.scheduleExit()
+loop.join()
+
+# waits are callbacks on the watcher thread, which lets go of every loop once it ends
+for _ in range(20):
+    loop = EventLoop()
+    loop.load_module(path, block=True)
+    loop.scheduleExit()
+    loop.join()
+assert not get_watcher()._listeners, "ended loops should not be held by the watcher"
+shutil.rmtree(workdir)
+print("module completion ok")
@@ -0,0 +1,34 @@
+import os
+import time
+from rodio import EventLoopPool
+
+
+def hog(seconds):
+    time.sleep(seconds)
+
+
+def where(index):
+    time.sleep(0.01)
+    return (index, os.getpid())
+
+
+# a worker only takes drain_batch ticks off its lanes at a time, what it hasn't taken yet can be stolen
+pool = EventLoopPool(2, drain_batch=1)
+pool.register(hog)
+pool.register(where)
+# routing sends the second hog to the other, emptier worker. the one stuck on the
+# long hog leaves its share of the ticks behind for the other one to steal
+pool.nextTick(hog, 2)
+pool.nextTick(hog, 0.1)
+futures = [pool.submit(where, index) for index in range(20)]
+results = [future.result(timeout=30) for future in futures]
+stats = pool.stats()
+pool.scheduleExit()
+pool.join()
+
+print("stats", [(worker['dispatched'], worker['executed'], worker['stolen']) for worker in stats])
+assert sorted(index for (index, _) in results) == list(range(20)), "every tick should run once"
+assert all(worker['dispatched'] for worker in stats), "routing should spread ticks over both workers"
+assert sum(worker['stolen'] for worker in stats) > 0, "the idle worker should have stolen from the busy one"
+assert sum(worker['executed'] for worker in stats) == 22, "stolen ticks should not run twice"
+print("pool stealing ok")
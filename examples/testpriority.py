@@ -0,0 +1,55 @@
+import time
+from rodio import EventLoop, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+
+# lanes of the ticks the loop ran, in the order it ran them
+seen = []
+
+
+def stall(seconds):
+    time.sleep(seconds)
+
+
+def record(lane):
+    seen.append(lane)
+
+
+def report():
+    return list(seen)
+
+
+def run(**options):
+    loop = EventLoop(**options)
+    loop.register(stall)
+    loop.register(record)
+    loop.nextTick(stall, 0.5)
+    time.sleep(0.2)
+    # the bulk of the work is queued first, the urgent ticks last
+    for _ in range(40):
+        loop.nextTick(record, PRIORITY_LOW, priority=PRIORITY_LOW)
+        loop.nextTick(record, PRIORITY_NORMAL)
+    for _ in range(5):
+        loop.nextTick(record, PRIORITY_HIGH, priority=PRIORITY_HIGH)
+    ran = loop.submit(report, priority=PRIORITY_LOW).result(timeout=30)
+    loop.scheduleExit()
+    loop.join()
+    return ran
+
+
+ran = run(aging=None)
+assert ran == [PRIORITY_HIGH] * 5 + [PRIORITY_NORMAL] * 40 + [PRIORITY_LOW] * 40, \
+    "without aging higher lanes should always drain first"
+ran = run(aging=8)
+assert ran[:5] == [PRIORITY_HIGH] * 5, "urgent ticks should cut ahead of the bulk"
+normal_done = len(ran) - ran[::-1].index(PRIORITY_NORMAL)
+assert PRIORITY_LOW in ran[:normal_done], "aging should give the low lane turns while higher lanes are busy"
+assert sorted(ran) == sorted([PRIORITY_HIGH] * 5 + [PRIORITY_NORMAL] * 40 + [PRIORITY_LOW] * 40)
+
+loop = EventLoop(lanes=2)
+try:
+    loop.nextTick(record, 0, priority=2)
+    raise AssertionError("a priority past the last lane should be refused")
+except RuntimeError:
+    pass
+loop.scheduleExit()
+loop.join()
+print("priority ok")
@@ -0,0 +1,67 @@
+import os
+import json
+import time
+import asyncio
+import shutil
+import tempfile
+from rodio import EventLoop
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def nap(seconds):
+    await asyncio.sleep(seconds)
+
+
+def noop():
+    pass
+
+
+dump = os.path.join(tempfile.mkdtemp(prefix='rodioprofile'), 'profile-{pid}.json')
+loop = EventLoop(profile=True, profile_dump=dump)
+for _ in range(10):
+    loop.nextTick(spin, 0.02)
+for _ in range(5):
+    loop.nextTick(nap, 0.05)
+# stats() cuts ahead of the queue, so wait for the ticks to run first
+loop.submit(noop).result(timeout=30)
+stats = loop.stats(timeout=30)
+pid = loop._process.pid
+loop.scheduleExit()
+loop.join()
+
+spun = stats['__main__.spin']
+assert spun['count'] == 10, spun
+assert spun['wall_p50_us'] >= 15000, "a 20ms tick should show about 20ms of wall time"
+assert spun['cpu_p50_us'] >= 10000, "a busy tick spends most of its wall time on the CPU"
+napped = stats['__main__.nap']
+assert napped['count'] == 5, napped
+assert napped['wall_p50_us'] >= 40000, "a coroutine should be charged for the time it was awaited"
+assert napped['cpu_p50_us'] < 10000, "but not for the CPU time of whatever ran while it slept"
+with open(dump.format(pid=pid)) as file:
+    dumped = json.load(file)
+assert dumped['callables']['__main__.spin']['count'] == 10, "the profile should be dumped on exit"
+shutil.rmtree(os.path.dirname(dump))
+
+# sampling only profiles one tick out of every profile_sample
+loop = EventLoop(profile=True, profile_sample=4)
+for _ in range(20):
+    loop.nextTick(noop)
+loop.submit(noop).result(timeout=30)
+assert loop.stats(timeout=30)['__main__.noop']['count'] == 5, "one out of every 4 of 21 ticks should be profiled"
+loop.scheduleExit()
+loop.join()
+
+loop = EventLoop()
+try:
+    loop.stats()
+    raise AssertionError("stats() needs profiling on")
+except RuntimeError:
+    pass
+loop.scheduleExit()
+loop.join()
+print("profiling ok")
@@ -0,0 +1,72 @@
+import os
+import time
+import asyncio
+import threading
+from rodio import EventLoop
+
+# what the loop ran, in the order it ran it
+seen = []
+
+
+def record(index):
+    seen.append(index)
+
+
+def report():
+    return list(seen)
+
+
+def stall(seconds):
+    time.sleep(seconds)
+
+
+async def produce(loop, count):
+    for index in range(count):
+        await loop.push_async(record, index)
+    return await loop.submit_async(report)
+
+
+async def heartbeat(beats, stop):
+    while not stop.is_set():
+        beats.append(time.monotonic())
+        await asyncio.sleep(0.01)
+
+
+async def main():
+    # one producer drives many loops at once, each keeps its own order
+    loops = [EventLoop() for _ in range(12)]
+    for loop in loops:
+        loop.register(record)
+        loop.register(report)
+    results = await asyncio.gather(*(produce(loop, 50) for loop in loops))
+    assert all(ran == list(range(50)) for ran in results), "push_async should keep each loop's ticks in order"
+    producers = [thread for thread in threading.enumerate() if thread.name.startswith('RodioProducer')]
+    print("producer threads", len(producers))
+    assert len(producers) <= min(32, (os.cpu_count() or 1) + 4), "producer threads should be shared, not one per loop"
+    for loop in loops:
+        loop.scheduleExit()
+    await asyncio.gather(*(loop.join_async() for loop in loops))
+    assert all(loop.ended() for loop in loops)
+
+    # a push waiting on a full queue leaves the caller's event loop running
+    loop = EventLoop(maxsize=1)
+    loop.register(stall)
+    await loop.push_async(stall, 0.5)
+    await asyncio.sleep(0.2)
+    await loop.push_async(stall, 0)
+    beats = []
+    stop = asyncio.Event()
+    beating = asyncio.ensure_future(heartbeat(beats, stop))
+    started = time.monotonic()
+    await loop.push_async(stall, 0, timeout=5)
+    waited = time.monotonic() - started
+    stop.set()
+    await beating
+    assert waited > 0.1, "the push should have waited for room"
+    assert len(beats) >= 5, "the event loop should keep running while a push waits"
+    loop.scheduleExit()
+    await loop.join_async()
+
+
+asyncio.run(main())
+print("push async ok")
@@ -0,0 +1,51 @@
+from rodio import EventLoop
+
+table = list(range(20000))
+
+
+def lookup(index):
+    return table[index]
+
+
+def size(entry):
+    return len(entry[0] if isinstance(entry, tuple) else entry)
+
+
+loop = EventLoop()
+
+
+@loop.register
+def registered(index):
+    return table[index] * 3
+
+
+loop.submit(lookup, 0).result(timeout=10)
+
+# what each push hands to the lanes
+sizes = []
+put = loop._queue._lanes.put
+loop._queue._lanes.put = lambda entry, *args: sizes.append(size(entry)) or put(entry, *args)
+
+unregistered = lambda index: table[index] * 3
+assert loop.submit(unregistered, 5).result(timeout=10) == 15
+for index in range(3):
+    assert loop.submit(registered, index).result(timeout=10) == index * 3
+print("block sizes", sizes)
+[by_value, first, *later] = sizes
+assert first > by_value // 2, "the first push of a registered callable carries its definition"
+assert by_value > 3 * max(later), "later pushes should only carry the callable's id, not its code"
+
+# callables registered after the loop started get their definition shipped on first use too
+late = loop.register(lambda index: -table[index])
+assert loop.submit(late, 7).result(timeout=10) == -7
+assert loop.submit(late, 8).result(timeout=10) == -8
+loop._queue._lanes.put = put
+loop.scheduleExit()
+loop.join()
+
+try:
+    loop.register(42)
+    raise AssertionError("only callables can be registered")
+except TypeError:
+    pass
+print("registry ok")
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import queue
+import multiprocessing
+from rodio import EventLoop, EventQueue
+
+# producer pid -> indices the consumer ran, in the order it ran them
+seen = {}
+
+
+def record(producer, index):
+    seen.setdefault(producer, []).append(index)
+
+
+def report():
+    return dict(seen)
+
+
+def stall(seconds, payload=None):
+    time.sleep(seconds)
+
+
+def noop(index):
+    pass
+
+
+def finish():
+    sys.exit()
+
+
+def produce(eventqueue, count):
+    for index in range(count):
+        eventqueue.push(record, (os.getpid(), index))
+
+
+def consume(eventqueue, results):
+    try:
+        eventqueue.start()
+    except SystemExit:
+        pass
+    results.put(seen)
+
+
+# several producer processes write into the same rings
+eventqueue = EventQueue(transport='ring')
+results = multiprocessing.Queue()
+consumer = multiprocessing.Process(target=consume, args=(eventqueue, results))
+consumer.start()
+producers = [multiprocessing.Process(target=produce, args=(eventqueue, 500)) for _ in range(3)]
+[producer.start() for producer in producers]
+produce(eventqueue, 500)
+[producer.join() for producer in producers]
+eventqueue.push(finish)
+ran = results.get(timeout=30)
+consumer.join()
+assert sorted(ran) == sorted([producer.pid for producer in producers] + [os.getpid()])
+assert all(indices == list(range(500)) for indices in ran.values()), \
+    "every producer's ticks should run once, in order"
+
+# a full ring refuses or holds pushes until the loop makes room
+loop = EventLoop(transport='ring', ring_size=4096)
+loop.register(stall)
+loop.nextTick(stall, 0.6)
+time.sleep(0.2)
+try:
+    for _ in range(1000):
+        loop.nextTick(stall, 0, b'x' * 100, block=False)
+    raise AssertionError("a full ring should refuse a non-blocking push")
+except queue.Full:
+    pass
+try:
+    loop.nextTick(stall, 0, b'x' * 100, timeout=0.05)
+    raise AssertionError("a push that times out on a full ring should raise")
+except queue.Full:
+    pass
+started = time.monotonic()
+loop.nextTick(stall, 0, b'x' * 100, timeout=5)
+assert time.monotonic() - started > 0.1, "a blocking push should wait for room"
+try:
+    loop.nextTick(stall, 0, b'x' * 8192)
+    raise AssertionError("a tick bigger than the ring can never fit")
+except RuntimeError:
+    pass
+loop.scheduleExit()
+loop.join()
+
+
+def per_tick(transport, ticks=10000):
+    loop = EventLoop(transport=transport)
+    loop.register(noop)
+    loop.register(report)
+    loop.submit(report).result(timeout=10)
+    started = time.perf_counter()
+    for index in range(ticks):
+        loop.nextTick(noop, index)
+    loop.submit(report).result(timeout=60)
+    elapsed = (time.perf_counter() - started) / ticks
+    loop.scheduleExit()
+    loop.join()
+    return elapsed
+
+
+ring = min(per_tick('ring') for _ in range(2))
+pipe = min(per_tick('pipe') for _ in range(2))
+print(f"small ticks, ring {ring * 1e6:.1f}us, pipe {pipe * 1e6:.1f}us")
+assert ring < pipe, "the ring should carry small ticks faster than the pipe"
+print("ring transport ok")
@@ -0,0 +1,65 @@
+import os
+import pickle
+import importlib.util
+from rodio import EventLoop
+from rodio.internals.serializer import AutoSerializer, get_serializer
+
+
+def add(a, b):
+    return a + b
+
+
+class Counting:
+    # a custom serializer, plain pickle underneath
+    def __init__(self):
+        self.dumped = 0
+
+    def dumps(self, obj, buffers=None):
+        self.dumped += 1
+        return pickle.dumps(obj)
+
+    def loads(self, data, buffers=None):
+        return pickle.loads(data)
+
+
+# functions from importable modules go by reference through stdlib pickle, the rest through dill
+auto = AutoSerializer()
+assert auto.dumps(os.getpid)[:1] == b'p', "importable functions should take the pickle path"
+assert auto.dumps(lambda: None)[:1] == b'd', "lambdas should fall back to dill"
+assert auto.loads(auto.dumps(os.getpid)) is os.getpid
+assert auto.loads(auto.dumps(lambda x: x * 2))(4) == 8
+
+# cloudpickle is optional
+names = ['auto', 'pickle', 'dill'] + (['cloudpickle'] if importlib.util.find_spec('cloudpickle') else [])
+for name in names:
+    loop = EventLoop(serializer=name)
+    assert loop.submit(add, 2, 3).result(timeout=10) == 5, f"{name} should carry a plain function"
+    if name != 'pickle':
+        assert loop.submit(lambda: 'closure').result(timeout=10) == 'closure', f"{name} should carry a lambda"
+    else:
+        try:
+            loop.nextTick(lambda: None)
+            raise AssertionError("stdlib pickle can't carry a lambda")
+        except (pickle.PicklingError, AttributeError, TypeError):
+            pass
+    loop.scheduleExit()
+    loop.join()
+
+counting = Counting()
+loop = EventLoop(serializer=counting)
+assert loop.submit(add, 'a', 'b').result(timeout=10) == 'ab'
+loop.scheduleExit()
+loop.join()
+assert counting.dumped, "a custom serializer should be the one used"
+
+try:
+    get_serializer('marshal')
+    raise AssertionError("unknown serializer names should be refused")
+except RuntimeError:
+    pass
+try:
+    get_serializer(object())
+    raise AssertionError("objects without dumps and loads should be refused")
+except TypeError:
+    pass
+print("serializers ok")
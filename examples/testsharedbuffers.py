@@ -0,0 +1,52 @@
+import os
+import time
+import hashlib
+from rodio import EventLoop
+
+# views the loop holds onto past the tick that received them
+kept = []
+
+
+def digest(data):
+    return (type(data).__name__, hashlib.sha256(data).hexdigest())
+
+
+def keep(data):
+    kept.append(data)
+
+
+def kept_digest():
+    return hashlib.sha256(kept[0]).hexdigest()
+
+
+def stall(seconds, payload=None):
+    time.sleep(seconds)
+
+
+def segments():
+    # where shared memory segments show up on linux
+    return [name for name in os.listdir('/dev/shm') if name.startswith('rodio_')] if os.path.isdir('/dev/shm') else []
+
+
+big = os.urandom(2 << 20)
+loop = EventLoop(shm_threshold=1 << 20)
+for (arg, kind) in [(big, 'memoryview'), (bytearray(big), 'memoryview'), (memoryview(big), 'memoryview'), (big[:100], 'bytes')]:
+    assert loop.submit(digest, arg).result(timeout=10) == (kind, hashlib.sha256(arg).hexdigest()), \
+        f"a {type(arg).__name__} of {len(arg)} bytes should reach the loop intact as {kind}"
+# a view kept past its tick pins its segment until it's let go of
+loop.nextTick(keep, big)
+assert loop.submit(kept_digest).result(timeout=10) == hashlib.sha256(big).hexdigest()
+# ticks dropped before running still give their segments back
+loop.nextTick(stall, 0.3)
+for _ in range(3):
+    loop.nextTick(stall, 0, big, ttl=0.05)
+loop.scheduleExit()
+loop.join()
+assert not segments(), f"segments left behind: {segments()}"
+
+# without a threshold large buffers go through the queue inline
+loop = EventLoop(shm_threshold=None)
+assert loop.submit(digest, big).result(timeout=10) == ('bytes', hashlib.sha256(big).hexdigest())
+loop.scheduleExit()
+loop.join()
+print("shared buffers ok")
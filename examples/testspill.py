@@ -0,0 +1,77 @@
+import os
+import time
+import tempfile
+import statistics
+from rodio import EventLoop, PRIORITY_NORMAL, PRIORITY_LOW
+
+# what the loop ran, in the order it ran it
+seen = []
+
+
+def record(lane, index, padding):
+    seen.append((lane, index))
+
+
+def report():
+    return list(seen)
+
+
+def stall(seconds):
+    time.sleep(seconds)
+
+
+def echo(value):
+    return value
+
+
+spill_dir = tempfile.mkdtemp(prefix='rodiospill')
+loop = EventLoop(spill_threshold=200_000, spill_dir=spill_dir, spill_segment_size=1 << 20)
+loop.register(record)
+loop.register(stall)
+# the loop stalls while the queue fills, everything past the threshold goes to disk
+loop.nextTick(stall, 0.5)
+for index in range(20000):
+    loop.nextTick(record, PRIORITY_NORMAL, index, b'x' * 200)
+for index in range(2000):
+    loop.nextTick(record, PRIORITY_LOW, index, b'y' * 200, priority=PRIORITY_LOW)
+spilled = loop.spill_stats()
+print("spilled", spilled['spilled_ticks'], "ticks in", spilled['segments_total'], "segments")
+assert spilled['spilled_ticks'] > 0, "ticks past the threshold should have been spilled"
+ran = loop.submit(report, priority=PRIORITY_LOW).result(timeout=60)
+for lane in (PRIORITY_NORMAL, PRIORITY_LOW):
+    indices = [index for (tick_lane, index) in ran if tick_lane == lane]
+    assert indices == list(range(len(indices))), f"lane {lane} ran its ticks out of order"
+# spilled ticks may still be draining, anything pushed now queues behind them
+for index in range(20000, 20100):
+    loop.nextTick(record, PRIORITY_NORMAL, index, b'')
+# each lane runs in order, so a report queued on a lane runs after everything pushed to it before
+normal = loop.submit(report, priority=PRIORITY_NORMAL).result(timeout=60)
+low = loop.submit(report, priority=PRIORITY_LOW).result(timeout=60)
+loop.scheduleExit()
+loop.join()
+
+assert [index for (lane, index) in normal if lane == PRIORITY_NORMAL] == list(range(20100)), \
+    "the normal lane lost or reordered ticks"
+assert [index for (lane, index) in low if lane == PRIORITY_LOW] == list(range(2000)), \
+    "the low lane lost or reordered ticks"
+assert not os.listdir(spill_dir), "segments should be unlinked once the loop ends"
+
+# with every tick spilled, an idle loop still has to wake up for each one
+loop = EventLoop(spill_threshold=0, spill_dir=spill_dir)
+loop.register(echo)
+loop.submit(echo, None).result(timeout=10)
+latencies = []
+for index in range(30):
+    time.sleep(0.01)
+    started = time.perf_counter()
+    assert loop.submit(echo, index).result(timeout=10) == index
+    latencies.append(time.perf_counter() - started)
+assert loop.spill_stats()['spilled_ticks'] > 30, "every tick should have been spilled"
+loop.scheduleExit()
+loop.join()
+median = statistics.median(latencies)
+print(f"spilled tick latency {median * 1e3:.2f}ms")
+assert median < 0.02, "a spilled tick should wake an idle loop, not wait out its idle poll"
+assert not os.listdir(spill_dir), "segments should be unlinked once the loop ends"
+os.rmdir(spill_dir)
+print("spill ok")
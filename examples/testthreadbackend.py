@@ -0,0 +1,49 @@
+import os
+import time
+import threading
+from rodio import EventLoop, get_current_loop
+
+
+def where(token):
+    return (os.getpid(), threading.get_ident(), token, get_current_loop(None))
+
+
+def noop():
+    pass
+
+
+def startup(backend):
+    started = time.perf_counter()
+    loop = EventLoop(backend=backend)
+    loop.submit(noop).result(timeout=10)
+    elapsed = time.perf_counter() - started
+    loop.scheduleExit()
+    loop.join()
+    return elapsed
+
+
+# unpicklable, only gets through if nothing is serialized
+token = threading.Lock()
+loops = [EventLoop(backend='thread') for _ in range(2)]
+for loop in loops:
+    (pid, thread, received, current) = loop.submit(where, token).result(timeout=10)
+    assert pid == os.getpid(), "a thread-backed loop runs within this process"
+    assert thread != threading.get_ident(), "...on a thread of its own"
+    assert received is token, "ticks should reach a thread-backed loop without being copied"
+    assert current is loop, "get_current_loop() should resolve each loop from within its own thread"
+assert get_current_loop(None) is None, "no loop is current outside of them"
+for loop in loops:
+    loop.scheduleExit()
+    loop.join()
+
+thread = min(startup('thread') for _ in range(3))
+process = min(startup('process') for _ in range(3))
+print(f"start to first result, thread {thread * 1e3:.2f}ms, process {process * 1e3:.2f}ms")
+assert thread < process, "a thread-backed loop should come up faster than a forked one"
+
+try:
+    EventLoop(backend='thread', at_least_once=True, autostart=False)
+    raise AssertionError("at_least_once needs a process that can crash on its own")
+except RuntimeError:
+    pass
+print("thread backend ok")
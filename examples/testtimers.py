@@ -0,0 +1,50 @@
+import time
+from rodio import EventLoop
+
+# timers fire inside the loop, so what they record is read back with submit()
+fired = []
+
+
+def record(tag):
+    fired.append((tag, time.monotonic()))
+
+
+def report():
+    return list(fired)
+
+
+loop = EventLoop()
+started = time.monotonic()
+loop.setTimeout(record, 0.3, 'once')
+cleared = loop.setTimeout(record, 0.2, 'cleared')
+loop.clearTimeout(cleared)
+interval = loop.setInterval(record, 0.1, 'interval')
+time.sleep(0.75)
+loop.clearInterval(interval)
+time.sleep(0.3)
+# delays the loop's clock can't hit exactly, none of them may fire early
+delays = {}
+for index in range(20):
+    delays[index] = (time.monotonic(), 0.05 + index * 0.0137)
+    loop.setTimeout(record, delays[index][1], index)
+time.sleep(0.4)
+seen = loop.submit(report).result(timeout=5)
+time.sleep(0.3)
+after = loop.submit(report).result(timeout=5)
+loop.scheduleExit()
+loop.join()
+
+tags = [tag for (tag, _) in seen]
+print("fired", [tag for tag in tags if isinstance(tag, str)])
+assert tags.count('once') == 1, "setTimeout should fire exactly once"
+assert seen[tags.index('once')][1] - started >= 0.3, "setTimeout fired early"
+assert 'cleared' not in tags, "a cleared timeout should never fire"
+assert 3 <= tags.count('interval') <= 8, "setInterval should keep firing until cleared"
+assert after == seen, "a cleared interval should stop firing"
+for (index, [set_at, delay]) in delays.items():
+    assert tags.count(index) == 1, f"timeout {index} should fire once"
+    assert seen[tags.index(index)][1] - set_at >= delay, f"timeout {index} fired early"
+# an interval is due every period counted from when it was set, never any sooner
+ticks = [when for (tag, when) in seen if tag == 'interval']
+assert all(when - started >= 0.1 * count for (count, when) in enumerate(ticks, 1)), "setInterval fired early"
+print("timers ok")
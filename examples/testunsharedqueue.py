@@ -0,0 +1,74 @@
+import time
+import queue
+import threading
+from rodio import EventQueue
+from rodio.internals.lanes import LocalLanes
+
+# producer -> indices the consumer ran, in the order it ran them
+seen = {}
+
+
+def record(producer, index, token):
+    assert token is tokens[producer], "an unshared queue should hand over the very same object"
+    seen.setdefault(producer, []).append(index)
+
+
+def noop(index):
+    pass
+
+
+# unpicklable, so these only get through if nothing is serialized
+tokens = [threading.Lock() for _ in range(4)]
+
+eventqueue = EventQueue(shared_queue=False)
+assert isinstance(eventqueue._lanes, LocalLanes)
+assert isinstance(eventqueue._statusLock, type(threading.Lock())), "an unshared queue should use threading primitives"
+assert isinstance(eventqueue._queueMgmtLock, type(threading.Lock()))
+consumer = threading.Thread(target=eventqueue.start)
+consumer.start()
+
+
+def produce(producer):
+    for index in range(1000):
+        eventqueue.push(record, (producer, index, tokens[producer]))
+
+
+producers = [threading.Thread(target=produce, args=(producer,)) for producer in range(4)]
+[producer.start() for producer in producers]
+[producer.join() for producer in producers]
+eventqueue.push(eventqueue.end)
+consumer.join(timeout=30)
+assert not consumer.is_alive(), "the queue should have ended"
+assert all(seen.get(producer) == list(range(1000)) for producer in range(4)), \
+    "every producer's ticks should run once, in order"
+
+
+def per_tick(push, drain, ticks=50000):
+    started = time.perf_counter()
+    for index in range(ticks):
+        push(index)
+    drain()
+    return (time.perf_counter() - started) / ticks
+
+
+def drain_bare():
+    while True:
+        try:
+            [fn, args] = bare.get_nowait()
+        except queue.Empty:
+            return
+        fn(*args)
+
+
+# the unshared queue's overhead per tick stays within a small multiple of a bare queue.Queue
+best = []
+for _ in range(3):
+    eventqueue = EventQueue(shared_queue=False)
+    bare = queue.Queue()
+    ours = per_tick(lambda index: eventqueue.push(noop, (index,)),
+                    lambda: eventqueue.push(eventqueue.end) or eventqueue.start())
+    theirs = per_tick(lambda index: bare.put((noop, (index,))), drain_bare)
+    best.append(ours / theirs)
+print(f"{min(best):.1f}x a bare queue.Queue per tick")
+assert min(best) < 6, "an unshared queue should cost about as much as a bare queue.Queue"
+print("unshared queue ok")
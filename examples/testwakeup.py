@@ -0,0 +1,54 @@
+import time
+import statistics
+from rodio import EventLoop
+
+
+def stall(seconds):
+    time.sleep(seconds)
+
+
+def echo(value):
+    return value
+
+
+loop = EventLoop()
+loop.register(stall)
+loop.register(echo)
+loop.submit(echo, None).result(timeout=10)
+
+# an idle loop blocks on its lanes and wakes on the push itself, not on its next poll
+latencies = []
+for index in range(30):
+    time.sleep(0.01)
+    started = time.perf_counter()
+    assert loop.submit(echo, index).result(timeout=10) == index
+    latencies.append(time.perf_counter() - started)
+median = statistics.median(latencies)
+print(f"idle wakeup {median * 1e3:.2f}ms")
+assert median < 0.02, "an idle loop should wake as soon as a tick lands"
+time.sleep(0.05)
+assert loop.paused(), "an idle loop still reports itself paused"
+
+# pushes to a running queue leave its status alone
+resumes = []
+resume = loop._queue._resume
+loop._queue._resume = lambda: resumes.append(None) or resume()
+loop.nextTick(stall, 0.5)
+time.sleep(0.2)
+assert not loop.paused(), "a loop running a tick isn't paused"
+resumes.clear()
+for index in range(50):
+    loop.nextTick(echo, index)
+assert not resumes, f"{len(resumes)} pushes to a running queue went through its status lock"
+loop._queue._resume = resume
+assert loop.submit(echo, 'done').result(timeout=10) == 'done'
+
+# an explicit pause holds until resumed
+loop.pause()
+time.sleep(0.3)
+assert loop.paused(), "a pause should leave the loop paused"
+loop.resume()
+assert loop.submit(echo, 'resumed').result(timeout=10) == 'resumed'
+loop.scheduleExit()
+loop.join()
+print("wakeup ok")
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+from rodio import EventLoop, WarmPool, get_running_loop
+
+
+def describe():
+    return (os.getpid(), get_running_loop().get_name(), 'colorsys' in sys.modules)
+
+
+def noop():
+    pass
+
+
+def cold():
+    started = time.perf_counter()
+    loop = EventLoop()
+    loop.submit(noop).result(timeout=10)
+    elapsed = time.perf_counter() - started
+    loop.scheduleExit()
+    loop.join()
+    return elapsed
+
+
+pool = WarmPool(2, preload=['colorsys'])
+assert pool.spares() == 2, "the pool should start out full"
+warm = []
+loops = []
+for index in range(4):
+    # give the refiller time to bring a spare back up
+    time.sleep(0.3)
+    started = time.perf_counter()
+    loop = pool.acquire(f'request{index}')
+    (pid, name, preloaded) = loop.submit(describe).result(timeout=10)
+    warm.append(time.perf_counter() - started)
+    assert name == f'request{index}', "an acquired loop should carry its new name within it too"
+    assert preloaded, "preloaded modules should already be imported within the spare"
+    loops.append((loop, pid))
+assert len({pid for (_, pid) in loops}) == 4, "every acquire should hand over a loop of its own"
+time.sleep(0.3)
+assert pool.spares() == 2, "the pool should refill in the background"
+for (loop, _) in loops:
+    loop.scheduleExit()
+    loop.join()
+pool.close()
+try:
+    pool.acquire()
+    raise AssertionError("a closed pool shouldn't hand out loops")
+except RuntimeError:
+    pass
+
+started = min(cold() for _ in range(3))
+print(f"start to first result, warm {min(warm) * 1e3:.2f}ms, cold {started * 1e3:.2f}ms")
+assert min(warm) < started, "a warm loop should be ready sooner than a freshly started one"
+print("warm pool ok")
@@ -15,14 +15,40 @@ __maintainer__ = "Miraculous Owonubi"
 __email__ = "omiraculous@gmail.com"
 __status__ = "Development"
 
-from .eventloop import *
-from .eventqueue import *
-from .rodiothread import *
-from .rodioprocess import *
-from .internals.uvloopwrapper import *
+import importlib
+
+# every export and the submodule it lives in, imported on first access so that
+# `import rodio` stays cheap for tools that only ever touch part of it
+_exports = {
+    'eventloop': ['EventLoop', 'LoopTimer', 'is_within_loop', 'get_running_loop', 'get_current_loop',
+                  'check_or_get_loop', 'is_actively_within_module'],
+    'eventqueue': ['EventQueue', 'TickHandle', 'PRIORITY_HIGH', 'PRIORITY_NORMAL', 'PRIORITY_LOW'],
+    'eventlooppool': ['EventLoopPool'],
+    'warmpool': ['WarmPool'],
+    'rodiothread': ['RodioThread', 'get_running_thread', 'get_current_thread'],
+    'rodioprocess': ['RodioProcess', 'get_running_process', 'get_current_process'],
+}
+_origins = {name: module for (module, names) in _exports.items()
+            for name in names}
+
+__all__ = [*_origins, 'printfromprocess']
+
+
+def __getattr__(name):
+    module = _origins.get(name)
+    if module is None:
+        raise AttributeError(f"module 'rodio' has no attribute '{name}'")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
 
 
 def printfromprocess(*args, **kwargs):
+    from .rodioprocess import get_running_process
     process = get_running_process()
     print(f'|{process.name}|> ', *args, **kwargs)
 
@@ -30,6 +56,9 @@ def printfromprocess(*args, **kwargs):
 """
 rodio.EventLoop()
 rodio.EventQueue()
+rodio.TickHandle()
+rodio.EventLoopPool()
+rodio.WarmPool()
 rodio.RodioThread()
 rodio.RodioProcess()
 rodio.printfromprocess()
@@ -51,6 +80,13 @@ rodio.eventloop.is_actively_within_module()
 
 rodio.eventqueue
 rodio.eventqueue.EventQueue()
+rodio.eventqueue.TickHandle()
+
+rodio.eventlooppool
+rodio.eventlooppool.EventLoopPool()
+
+rodio.warmpool
+rodio.warmpool.WarmPool()
 
 rodio.rodiothread
 rodio.rodiothread.RodioThread()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""
+                            rodio:
+Efficient non-blocking event loops for async concurrency and I/O
+          Think of this as AsyncIO on steroids
+"""
+
+import os
+import sys
+import time
+import fnmatch
+import platform
+from .scenarios import scenarios
+
+__all__ = ['run', 'compare', 'scenarios']
+
+
+def _better(metric, first, second):
+    if metric.endswith('_per_sec'):
+        return max(first, second)
+    return min(first, second)
+
+
+def run(patterns=None, *, scale=100, repeat=3, progress=None):
+    # scale is a percentage of each scenario's default workload, and every metric
+    # keeps the best of its repeats, the others mostly measure the machine's noise
+    selected = [name for name in scenarios
+                if not patterns or any(fnmatch.fnmatch(name, pattern) for pattern in patterns)]
+    if not selected:
+        raise RuntimeError(f"no benchmark scenario matches {patterns}")
+    import rodio
+    results = {}
+    for name in selected:
+        if progress:
+            progress(name)
+        for _ in range(repeat):
+            metrics = scenarios[name](scale)
+            results[name] = {metric: _better(metric, value, results[name][metric])
+                             for (metric, value) in metrics.items()} if name in results else metrics
+    return {
+        'meta': {
+            'rodio': rodio.__version__,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'scale': scale,
+            'repeat': repeat,
+            'timestamp': time.time(),
+            'argv': sys.argv,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance=0.1):
+    # every metric that got worse by more than the tolerance, as [scenario, metric, baseline, current, change]
+    regressions = []
+    for (name, metrics) in current['results'].items():
+        previous = baseline['results'].get(name)
+        if not previous:
+            continue
+        for (metric, value) in metrics.items():
+            before = previous.get(metric)
+            # single worst samples are reported, not judged, a stray context switch decides them
+            if not before or metric == 'ticks' or metric.startswith('max_'):
+                continue
+            change = (value - before) / before
+            worse = -change if metric.endswith('_per_sec') else change
+            if worse > tolerance:
+                regressions.append([name, metric, before, value, change])
+    return regressions
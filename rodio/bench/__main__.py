@@ -0,0 +1,54 @@
+import sys
+import json
+import argparse
+from . import run, compare, scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m rodio.bench', description="Measures rodio's tick throughput, latency and loop lifecycle")
+    parser.add_argument('patterns', nargs='*',
+                        help="only run scenarios matching these glob patterns")
+    parser.add_argument('-o', '--output',
+                        help="write the results to this JSON file")
+    parser.add_argument('-b', '--baseline',
+                        help="compare against results previously saved with --output")
+    parser.add_argument('-t', '--tolerance', type=float, default=0.1,
+                        help="share by which a metric may get worse before it counts as a regression [0.1]")
+    parser.add_argument('-s', '--scale', type=int, default=100,
+                        help="workload as a percentage of the default one [100]")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="runs per scenario, each metric keeps its best one [3]")
+    parser.add_argument('-l', '--list', action='store_true',
+                        help="list the scenarios and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(scenarios))
+        return 0
+    results = run(args.patterns, scale=args.scale, repeat=args.repeat,
+                  progress=lambda name: print(f"running {name}", file=sys.stderr))
+    for (name, metrics) in results['results'].items():
+        print(name)
+        for (metric, value) in metrics.items():
+            print(f"  {metric:<16} {value:14.2f}")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline['meta'].get('scale') != args.scale:
+            print(f"warning: the baseline was measured at scale {baseline['meta'].get('scale')}, not {args.scale}",
+                  file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        for (name, metric, before, after, change) in regressions:
+            print(f"REGRESSION {name} {metric}: {before:.2f} -> {after:.2f} ({change:+.1%})")
+        if regressions:
+            return 1
+        print(f"no regression beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""
+                            rodio:
+Efficient non-blocking event loops for async concurrency and I/O
+          Think of this as AsyncIO on steroids
+"""
+
+import time
+import functools
+import statistics
+from ..eventloop import EventLoop
+
+__all__ = ['scenarios', 'scenario']
+
+# name -> fn(scale), each returning a dict of metrics. Metric names carry their unit,
+# `_per_sec` ones are better higher, every other one better lower
+scenarios = {}
+
+# bytes per argument of the large tick scenarios, under the default shared memory threshold
+LARGE = 256 << 10
+
+
+def scenario(name):
+    def wrapper(fn):
+        scenarios[name] = fn
+        return fn
+    return wrapper
+
+
+def noop(*args):
+    pass
+
+
+async def anoop(*args):
+    pass
+
+
+def _loop(shared, **options):
+    # unshared queues only take ticks from their own process, so those run on a thread
+    loop = EventLoop(autostart=False, **(options if shared else dict(options, backend='thread')))
+    loop.register(noop)
+    loop.register(anoop)
+    loop.start()
+    # the first tick pays for the loop's own start-up
+    loop.submit(noop).result(30)
+    return loop
+
+
+def _close(loop):
+    loop.scheduleExit()
+    loop.join()
+
+
+def _percentiles(samples, unit):
+    samples = sorted(samples)
+
+    def at(share):
+        return samples[min(len(samples) - 1, int(len(samples) * share))]
+    return {
+        f'p50_{unit}': at(0.5),
+        f'p90_{unit}': at(0.9),
+        f'p99_{unit}': at(0.99),
+        f'max_{unit}': samples[-1],
+        f'mean_{unit}': statistics.fmean(samples),
+    }
+
+
+def _throughput(fn, shared, payload, scale):
+    count = max(1, (2000 if payload else 20000) * scale // 100)
+    arg = bytes(LARGE) if payload else 0
+    loop = _loop(shared)
+    try:
+        start = time.perf_counter()
+        for _ in range(count):
+            loop.nextTick(fn, arg)
+        pushed = time.perf_counter()
+        # ticks run in order, so this one only resolves once every other has run
+        loop.submit(noop).result(300)
+        finished = time.perf_counter()
+    finally:
+        _close(loop)
+    return {
+        'ticks': count,
+        'push_per_sec': count / (pushed - start),
+        'ticks_per_sec': count / (finished - start),
+    }
+
+
+for (kind, fn) in [('sync', noop), ('coro', anoop)]:
+    for shared in (True, False):
+        for payload in (False, True):
+            scenarios[f"throughput.{kind}.{'shared' if shared else 'unshared'}.{'large' if payload else 'tiny'}"] = \
+                functools.partial(_throughput, fn, shared, payload)
+
+
+@scenario('latency.push')
+def push_latency(scale):
+    # how long nextTick() holds up its caller, one call at a time
+    count = max(1, 5000 * scale // 100)
+    loop = _loop(True)
+    samples = []
+    try:
+        for _ in range(count):
+            start = time.perf_counter_ns()
+            loop.nextTick(noop, 0)
+            samples.append((time.perf_counter_ns() - start) / 1000)
+        loop.submit(noop).result(300)
+    finally:
+        _close(loop)
+    return _percentiles(samples, 'us')
+
+
+@scenario('latency.tick')
+def tick_latency(scale):
+    # from submit() to its result being back with the caller, with nothing else queued
+    count = max(1, 2000 * scale // 100)
+    loop = _loop(True)
+    samples = []
+    try:
+        for _ in range(count):
+            start = time.perf_counter_ns()
+            loop.submit(noop, 0).result(30)
+            samples.append((time.perf_counter_ns() - start) / 1000)
+    finally:
+        _close(loop)
+    return _percentiles(samples, 'us')
+
+
+@scenario('lifecycle')
+def lifecycle(scale):
+    rounds = max(1, 10 * scale // 100)
+    phases = {'create_ms': [], 'start_ms': [], 'first_tick_ms': [],
+              'join_ms': [], 'terminate_ms': []}
+    for _ in range(rounds):
+        start = time.perf_counter()
+        loop = EventLoop(autostart=False)
+        created = time.perf_counter()
+        loop.start()
+        started = time.perf_counter()
+        loop.submit(noop).result(30)
+        ticked = time.perf_counter()
+        loop.scheduleExit()
+        loop.join()
+        joined = time.perf_counter()
+        phases['create_ms'].append((created - start) * 1000)
+        phases['start_ms'].append((started - created) * 1000)
+        phases['first_tick_ms'].append((ticked - started) * 1000)
+        phases['join_ms'].append((joined - ticked) * 1000)
+        loop = EventLoop(autostart=False)
+        loop.start()
+        loop.submit(noop).result(30)
+        start = time.perf_counter()
+        loop.terminate()
+        loop.join()
+        phases['terminate_ms'].append((time.perf_counter() - start) * 1000)
+    return {phase: statistics.median(samples) for (phase, samples) in phases.items()}
@@ -6,18 +6,31 @@ Efficient non-blocking event loops for async concurrency and I/O
           Think of this as AsyncIO on steroids
 """
 
+import os
 import sys
+import time
+import asyncio
+import functools
+import marshal
+import itertools
+import collections
 import importlib
+import importlib.util
+import contextlib
 import threading
 import multiprocessing
 import posixpath as xpath
+import traceback
+import concurrent.futures
 from .eventqueue import *
 from .rodiothread import *
 from .rodioprocess import *
 from .internals.debug import LogDebugger
+from .internals.completion import CompletionChannel, get_watcher
 from node_events import EventEmitter
 
 __all__ = ['EventLoop',
+           'LoopTimer',
            'is_within_loop',
            'get_running_loop',
            'get_current_loop',
@@ -26,58 +39,270 @@ __all__ = ['EventLoop',
 
 corelogger = LogDebugger("rodiocore.eventloop")
 
+# the EventLoop whose _run() owns the current thread
+_local = threading.local()
+
+# threads the *_async methods of every loop in this process share, [executor, pid]
+_producers = [None, None]
+
+
+def _producer_pool():
+    if _producers[1] != os.getpid():
+        _producers[:] = [concurrent.futures.ThreadPoolExecutor(
+            thread_name_prefix='RodioProducer'), os.getpid()]
+    return _producers[0]
+
+
+class _SerialProducer:
+    """
+    Runs one loop's producer calls in the order they were made, on the shared producer threads
+    """
+
+    def __init__(self):
+        self.__calls = collections.deque()
+        self.__lock = threading.Lock()
+        self.__running = False
+
+    def submit(self, fn):
+        future = concurrent.futures.Future()
+        with self.__lock:
+            self.__calls.append((future, fn))
+            if self.__running:
+                return future
+            self.__running = True
+        _producer_pool().submit(self.__run)
+        return future
+
+    def __run(self):
+        while True:
+            with self.__lock:
+                if not self.__calls:
+                    self.__running = False
+                    return
+                (future, fn) = self.__calls.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+
+
+# path -> [(mtime, size), marshalled code], so loops started from the same modules compile them once
+_code_cache = {}
+
+
+def _compile(name, path):
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _code_cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    # reads __pycache__ like any import would, and only compiles and writes it when stale
+    code = marshal.dumps(importlib.machinery.SourceFileLoader(
+        name, path).get_code(name))
+    _code_cache[path] = [key, code]
+    return code
+
+
+def _exec_module(name, path, code):
+    loop = get_running_loop()
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loop._modules[name] = module
+    try:
+        exec(marshal.loads(code), module.__dict__)
+    except:
+        sys.modules.pop(name, None)
+        loop._modules.pop(name, None)
+        raise
+
 
 class LoopModuleStruct(EventEmitter):
-    def __init__(self, loop, path):
+    """
+    Future of a module loaded into a loop, its events are emitted from the watcher thread
+    """
+
+    def __init__(self, loop, path, name):
         super(LoopModuleStruct, self).__init__()
         self.path = path
+        self.name = name
         self.loop = loop
-        self.loader = importlib.machinery.SourceFileLoader(
-            loop.get_name(), path)
-        self.is_loaded = multiprocessing.Event()
+        self.future = None
+        self.is_loaded = threading.Event()
+        self.is_complete = threading.Event()
 
-    def init(self):
-        self.loop._queue.once('end', self.is_loaded.set)
-        try:
-            self.loader.load_module()
-        finally:
-            self.is_loaded.set()
-
-    def wait(self, block=False, event_queue=[]):
-        def target():
-            self.is_loaded.wait()
-            self.emit('loaded')
-            for [eventname, ret, raw_event] in event_queue:
-                raw_event.wait()
-                self.emit(eventname, ret)
-
-        thandle = threading.Thread(target=target)
-        thandle.start()
-        thandle.join() if block else None
+    def __repr__(self):
+        return '<%s(%s, %s)>' % (type(self).__name__, self.path, "complete" if self.is_complete.is_set()
+                                 else "loaded" if self.is_loaded.is_set() else "loading")
+
+    def _settle(self, future):
+        # the module either ran through, failed or never got to, as the loop ended first
+        if not future.cancelled() and future.exception() is not None:
+            if self.hasListeners('error'):
+                self.emit('error', future.exception())
+            else:
+                print(f"module {self.path} failed to load", file=sys.stderr)
+                error = future.exception()
+                traceback.print_exception(type(error), error, error.__traceback__)
+        self.is_loaded.set()
+        self.emit('loaded')
+        # complete once whatever the module set off has run, and the loop ends or pauses
+        self.loop._queue._onHalt(self.__complete)
+
+    def __complete(self):
+        self.is_complete.set()
+        self.emit('complete', self.loop)
+
+    def wait(self, timeout=None):
+        return self.is_complete.wait(timeout)
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def exception(self, timeout=None):
+        return self.future.exception(timeout)
+
+    def add_done_callback(self, fn):
+        self.future.add_done_callback(lambda _: fn(self))
+
+    def __await__(self):
+        yield from asyncio.wrap_future(self.future).__await__()
         return self
 
 
+class LoopTimer:
+    def __init__(self, loop, timer_id, interval=None):
+        self.loop = loop
+        self.id = timer_id
+        self.interval = interval
+        self.cancelled = False
+
+    def __repr__(self):
+        return '<%s(%s, %s)>' % (type(self).__name__, "interval" if self.interval is not None else "timeout",
+                                 "cancelled" if self.cancelled else "active")
+
+    def cancel(self):
+        self.loop.clearTimeout(self)
+
+
+def _set_timer(timer_id, due, interval, stack, typeid, args):
+    get_running_loop()._queue._set_timer(
+        timer_id, due, interval, stack, typeid, args)
+
+
+def _clear_timer(timer_id):
+    get_running_loop()._queue._clear_timer(timer_id)
+
+
+def _profile_stats():
+    return get_running_loop()._queue.profile_stats()
+
+
+def _expiry(deadline, ttl):
+    # a time.monotonic() deadline, the sooner of the absolute one and the relative ttl
+    if ttl is None:
+        return deadline
+    if not (isinstance(ttl, (int, float)) and ttl >= 0):
+        raise RuntimeError("<ttl> parameter must be a non-negative number")
+    expiry = time.monotonic() + ttl
+    return expiry if deadline is None else min(deadline, expiry)
+
+
 class EventLoop(EventEmitter):
     _name = _queue = _process = __block = __autostarted = __queued_exit = None
 
     @corelogger.debugwrapper
-    def __init__(self, name: str = None, *, autostart=True, block=False, daemon=False, shared_queue=True, self_pause=True):
+    def __init__(self, name: str = None, *, autostart=True, block=False, daemon=False, shared_queue=True, self_pause=True, drain_batch=32, max_inflight=1, ordered=False, serializer=None, shm_threshold=1 << 20, lanes=3, aging=64, maxsize=None, max_bytes=None, backend='process', transport='pipe', ring_size=4 << 20, spill_threshold=None, spill_dir=None, spill_segment_size=64 << 20, at_least_once=False, max_respawns=8, profile=False, profile_sample=1, profile_dump=None):
+        if backend not in ('process', 'thread'):
+            raise RuntimeError(
+                "<backend> parameter must either be 'process' or 'thread'")
+        if at_least_once and backend != 'process':
+            raise RuntimeError(
+                "<at_least_once> parameter requires the process backend, a thread can't crash on its own")
+        if not (isinstance(max_respawns, int) and max_respawns >= 0):
+            raise RuntimeError(
+                "<max_respawns> parameter must be a non-negative int")
+        if not (isinstance(profile_sample, int) and profile_sample > 0):
+            raise RuntimeError(
+                "<profile_sample> parameter must be a positive int")
         self._name = name or 'RodioEventLoop'
+        self.__backend = backend
         self.__block = block
         self.__autostart = autostart
         self.__self_pause = self_pause
         self._is_directly_nested = is_within_loop()
-        self.__queued_exit = multiprocessing.Event()
-        self.__exit_on_exception = multiprocessing.Event()
-
-        self._queue = EventQueue(shared_queue=shared_queue)
-        self._process = RodioProcess(target=self._run,
-                                     name=self._name,
-                                     daemon=daemon)
-        self._process.on('beforeExit', self._onend)
-        setattr(self._process, '_eventloop', self)
+        threaded = backend == 'thread'
+        sync = threading if threaded else multiprocessing
+        self.__queued_exit = sync.Event()
+        self.__timer_ids = itertools.count()
+        # structs of the modules this loop was given, and within the loop, the modules themselves
+        self._module_stack = []
+        self._modules = {}
+        self.__executor = (None, None)
+        self.__exit_on_exception = sync.Event()
+        self.__daemon = daemon
+        self.__at_least_once = at_least_once
+        self.__max_respawns = max_respawns
+        self.__respawns = 0
+        self.__profile_dump = profile_dump
+        self.__supervising = threading.RLock()
+        # applied to every queue this loop builds, its replacements after a crash included
+        self.__wiring = []
+
+        # a thread shares the producer's memory, its ticks are never serialized
+        self.__queue_options = dict(shared_queue=shared_queue and not threaded,
+                                    drain_batch=drain_batch,
+                                    max_inflight=max_inflight,
+                                    ordered=ordered,
+                                    serializer=serializer,
+                                    shm_threshold=shm_threshold,
+                                    lanes=lanes,
+                                    aging=aging,
+                                    maxsize=maxsize,
+                                    max_bytes=max_bytes,
+                                    shared_state=not threaded,
+                                    transport=transport,
+                                    ring_size=ring_size,
+                                    spill_threshold=spill_threshold,
+                                    spill_dir=spill_dir,
+                                    spill_segment_size=spill_segment_size,
+                                    profile=profile_sample if profile else None)
+        self._queue = self.__buildQueue()
+        self.__owner = os.getpid()
+        self._process = self.__buildProcess()
+        if at_least_once:
+            self._queue._completions.supervisor = functools.partial(
+                self.__supervise, self._process, reap=True)
         super(EventLoop, self).__init__()
 
+    def __buildQueue(self):
+        queue = EventQueue(**self.__queue_options)
+        queue.on('highWater', lambda: self.emit('highWater'))
+        queue.on('lowWater', lambda: self.emit('lowWater'))
+        queue._completions = CompletionChannel()
+        return queue
+
+    def _wire(self, fn):
+        """
+        Call fn with the loop's queue, and with every queue that replaces it after a crash,
+        before the replacement starts
+        """
+        self.__wiring.append(fn)
+        fn(self._queue)
+
+    def __buildProcess(self):
+        process = (RodioThread if self.__backend == 'thread' else RodioProcess)(target=self._run,
+                                                                                 name=self._name,
+                                                                                 daemon=self.__daemon)
+        process.on('beforeExit', self._onend)
+        setattr(process, '_eventloop', self)
+        return process
+
     def __repr__(self):
         status = []
         if self.started():
@@ -96,6 +321,7 @@ class EventLoop(EventEmitter):
         return '<%s(%s, %s)>' % (type(self).__name__, self._name, ", ".join(status))
 
     def _run(self):
+        _local.loop = self
         try:
             self._queue.start()
         except SystemExit as e:
@@ -108,31 +334,191 @@ class EventLoop(EventEmitter):
             traceback.print_exc()
             self.__exit_on_exception.set()
             self._queue.end()
+        finally:
+            if self._queue._profiler:
+                self._queue._profiler.dump(self.__profile_dump and self.__profile_dump.format(
+                    name=self._name, pid=os.getpid()), self._name)
+            self._queue._completions.abandon(
+                "the event loop exited before completing the tick")
 
     def _onend(self):
         self.emit('beforeExit')
         if not self.__exit_on_exception.is_set():
             self._queue.end()
 
-    def __nextTick(self, coro, args):
-        if self.ended():
+    def __nextTick(self, coro, args, priority=None, future=None, block=True, timeout=None, deadline=None):
+        if self.ended() and not self.__revive(self._process):
             raise RuntimeError("Can't enqueue items to the ended process")
         if not self._can_enqueue_items():
             raise RuntimeError(
                 "Can't tick onto an EventLoop that has been started without a shared EventQueue")
         self.emit('nextTick', [coro, args])
-        self._queue.push(coro, args)
-        if self.__autostart and not self.started():
+        # with at least once delivery, the owner keeps every tick until the loop acknowledges it
+        supervised = self.__at_least_once and os.getpid() == self.__owner
+        ticket = None
+        with self.__supervising if supervised else contextlib.nullcontext():
+            queue = self._queue
+            if supervised or future is not None:
+                ticket = queue._completions.expect(
+                    future, (coro, args, priority, deadline) if supervised else None)
+        try:
+            handle = queue.push(coro, args, priority,
+                                ticket, block, timeout, deadline)
+        except:
+            if supervised and queue is not self._queue:
+                # the loop crashed and got replaced meanwhile, the replacement replays this tick
+                return
+            if ticket is not None:
+                queue._completions.forget(ticket)
+            raise
+        self.__autostartOnce()
+        if ticket is not None and self.__backend == 'process' and get_current_loop(None) is not self:
+            get_watcher().watch(queue._completions, self._process)
+        return handle
+
+    def __autostartOnce(self):
+        # the loop's own process may run ticks before its parent has marked it as started
+        if self.__autostart and not self.started() and get_current_loop(None) is not self:
             self.emit('autostart')
             self.start()
             self.__autostarted = True
 
     @corelogger.debugwrapper
-    def nextTick(self, coro, *args):
+    def nextTick(self, coro, *args, priority=None, block=True, timeout=None, deadline=None, ttl=None):
         if self.end_is_queued():
             raise RuntimeError(
                 "Can't enqueue items to a process thats scheduled to stop")
-        self.__nextTick(coro, args)
+        return self.__nextTick(coro, args, priority, None, block, timeout, _expiry(deadline, ttl))
+
+    def __setTimer(self, coro, delay, interval, args):
+        if not (isinstance(delay, (int, float)) and delay >= 0):
+            raise RuntimeError("timer delay must be a non-negative number")
+        [stack, typeid] = self._queue._build_stack(coro)
+        timer = LoopTimer(self, (os.getpid(), next(self.__timer_ids)), interval)
+        # timers are armed by a tick on the top lane, measured from right now on the
+        # time.monotonic() clock deadlines use, which wall clock changes don't shift
+        self.__nextTick(_set_timer, (timer.id, time.monotonic() + delay, interval, stack, typeid, args),
+                        PRIORITY_HIGH)
+        return timer
+
+    @corelogger.debugwrapper
+    def setTimeout(self, coro, delay, *args):
+        return self.__setTimer(coro, delay, None, args)
+
+    @corelogger.debugwrapper
+    def setInterval(self, coro, interval, *args):
+        if not (isinstance(interval, (int, float)) and interval > 0):
+            raise RuntimeError("timer interval must be a positive number")
+        return self.__setTimer(coro, interval, interval, args)
+
+    @corelogger.debugwrapper
+    def clearTimeout(self, timer):
+        if not isinstance(timer, LoopTimer):
+            raise TypeError("timer argument must be a LoopTimer object")
+        if timer.cancelled or self.ended():
+            return
+        timer.cancelled = True
+        self.__nextTick(_clear_timer, (timer.id,), PRIORITY_HIGH)
+
+    clearInterval = clearTimeout
+
+    @corelogger.debugwrapper
+    def register(self, fn):
+        self._queue.register(fn)
+        return fn
+
+    @corelogger.debugwrapper
+    def submit(self, coro, *args, priority=None, block=True, timeout=None, deadline=None, ttl=None):
+        if self.end_is_queued():
+            raise RuntimeError(
+                "Can't enqueue items to a process thats scheduled to stop")
+        within = get_current_loop(None) is self
+        if not (within or os.getpid() == self.__owner):
+            raise RuntimeError(
+                "submit() can only be called from the process that created the EventLoop or from within it")
+        future = concurrent.futures.Future()
+        handle = self.__nextTick(coro, args, priority, future,
+                                 block, timeout, _expiry(deadline, ttl))
+        if handle is not None:
+            # cancelling the future drops the tick too, unless the loop has already taken it
+            future.add_done_callback(
+                lambda future: future.cancelled() and handle.cancel())
+        return future
+
+    def __revive(self, process):
+        return self.__at_least_once and os.getpid() == self.__owner and self.__supervise(process)
+
+    def __supervise(self, process, reap=False):
+        # whichever of the watcher thread or the owner notices a crash first brings up the
+        # replacement, returns True once the given process has been replaced
+        with self.__supervising:
+            if self._process is not process:
+                return True
+            if not process.started():
+                return False
+            if reap:
+                # the sentinel may fire just before the exit status becomes available
+                process.join()
+            elif process.is_alive():
+                return False
+            exitcode = process.exitcode
+            # only deaths by signal count as crashes, not exits nor terminate() and kill()
+            if not (isinstance(exitcode, int) and exitcode < 0) or process._ended.is_set():
+                return False
+            if self.__respawns >= self.__max_respawns:
+                return False
+            self.__respawns += 1
+            self.__respawn(exitcode)
+            return True
+
+    def __respawn(self, exitcode):
+        if corelogger.enabled:
+            corelogger.log("__respawn", self._name, exitcode)
+        old = self._queue
+        # acknowledgements that made it out before the crash spare their ticks a replay
+        old._completions.receive()
+        self._queue = self.__buildQueue()
+        for fid in sorted(old._registered):
+            self._queue.register(old._registered[fid])
+        for fn in self.__wiring:
+            fn(self._queue)
+        channel = self._queue._completions
+        channel.adopt(old._completions)
+        self._process = self.__buildProcess()
+        channel.supervisor = functools.partial(
+            self.__supervise, self._process, reap=True)
+        self._process.start()
+        get_watcher().watch(channel, self._process)
+        for ticket in sorted(channel._envelopes, key=lambda ticket: ticket[1]):
+            [coro, args, priority, deadline] = channel._envelopes[ticket]
+            self._queue.push(coro, args, priority, ticket, deadline=deadline)
+        try:
+            # wakes producers still blocked on the old queue's bounds
+            old._end()
+        except RuntimeError:
+            pass
+        self.emit('respawn', exitcode)
+
+    def __producer(self):
+        # the loop's process is never forked off the worker thread, its exit would try joining it
+        self.__autostartOnce()
+        # one serial lane per loop and process keeps each producer's ticks in order,
+        # the threads under it are shared by every loop so they don't pile up with them
+        if self.__executor[0] != os.getpid():
+            self.__executor = (os.getpid(), _SerialProducer())
+        return self.__executor[1]
+
+    async def nextTick_async(self, coro, *args, priority=None, timeout=None, deadline=None, ttl=None):
+        # serialization and waits on a full queue happen off the caller's event loop
+        return await asyncio.wrap_future(self.__producer().submit(functools.partial(
+            self.nextTick, coro, *args, priority=priority, timeout=timeout, deadline=_expiry(deadline, ttl))))
+
+    push_async = nextTick_async
+
+    async def submit_async(self, coro, *args, priority=None, timeout=None, deadline=None, ttl=None):
+        future = await asyncio.wrap_future(self.__producer().submit(functools.partial(
+            self.submit, coro, *args, priority=priority, timeout=timeout, deadline=_expiry(deadline, ttl))))
+        return await asyncio.wrap_future(future)
 
     @corelogger.debugwrapper
     def start(self):
@@ -149,12 +535,51 @@ class EventLoop(EventEmitter):
 
     @corelogger.debugwrapper
     def join(self):
-        if get_current_process() is self._process:
+        if get_current_loop(None) is self:
             raise RuntimeError(
                 "You just tried to merge me and myself with my `join()` method... lol, you didn't mean that%s"
                 % '')
         self.emit('join')
-        self._process.join()
+        while True:
+            process = self._process
+            process.join()
+            # a crashed loop under at least once delivery carries on in its replacement
+            if not self.__revive(process):
+                break
+        self.__reclaim()
+
+    async def join_async(self):
+        if get_current_loop(None) is self:
+            raise RuntimeError(
+                "You just tried to merge me and myself with my `join_async()` method... lol, you didn't mean that%s"
+                % '')
+        if not self.started():
+            raise RuntimeError("can't join an EventLoop before it starts")
+        self.emit('join')
+        loop = asyncio.get_running_loop()
+        if self.__backend == 'thread':
+            # threads have no sentinel to wait on
+            return await loop.run_in_executor(None, self._process.join)
+        exited = loop.create_future()
+        sentinel = self._process.sentinel
+        loop.add_reader(sentinel, lambda: exited.done()
+                        or exited.set_result(None))
+        try:
+            await exited
+        finally:
+            loop.remove_reader(sentinel)
+        # already exited, this only reaps it
+        process = self._process
+        process.join()
+        if self.__revive(process):
+            await self.join_async()
+            return
+        self.__reclaim()
+
+    def __reclaim(self):
+        # a loop that was terminated or killed never got to drop what was left in its queue
+        if self.__backend == 'process' and self.ended():
+            self._queue._discard()
 
     @corelogger.debugwrapper
     def kill(self=None):
@@ -179,7 +604,7 @@ class EventLoop(EventEmitter):
         process.__queued_exit.clear()
         process._process._pre_exit()
         self.emit('exit')
-        exit(code)
+        sys.exit(code)
 
     @corelogger.debugwrapper
     def exit(self=None, code=0):
@@ -187,7 +612,7 @@ class EventLoop(EventEmitter):
         if not get_running_loop(None) is process:
             raise RuntimeError(
                 "exit() should only be called from self process")
-        exit(code)
+        sys.exit(code)
 
     def __raiseIfNotSelfPausable(self):
         if get_running_loop(None) is self and not self.__self_pause:
@@ -222,7 +647,7 @@ class EventLoop(EventEmitter):
     def scheduler(self, method, *, name=None, fn=None, fns=[], event=None, end_message=None, exec_checks=[]):
         fns.append(fn) if fn else None
         @corelogger.debugwrapper(name)
-        def deployed_fn(self, *args, **kwargs):
+        def deployed_fn(self, *args, priority=None, **kwargs):
             if self.ended():
                 raise RuntimeError(
                     end_message or f"can't execute {name or 'scheduled method'} on an ended process")
@@ -231,7 +656,7 @@ class EventLoop(EventEmitter):
                     raise slot[1]
             [fn(self, *args, **kwargs) for fn in fns]
             self.emit(event) if event else None
-            self.__nextTick(method, ())
+            self.__nextTick(method, (), priority)
         deployed_fn.__qualname__ = deployed_fn.__qualname__.replace(
             'scheduler.<locals>.deployed_fn', name)
         deployed_fn.__name__ = deployed_fn.__name__.replace(
@@ -279,6 +704,10 @@ class EventLoop(EventEmitter):
 
     @corelogger.debugwrapper
     def load_module(self, path: str, *, block=False):
+        return self.load_modules([path], block=block)[0]
+
+    @corelogger.debugwrapper
+    def load_modules(self, paths, *, block=False):
         if not EventLoop.is_eventloop(self):
             raise TypeError("loop argument must be a valid EventLoop object")
         if self.ended():
@@ -286,19 +715,34 @@ class EventLoop(EventEmitter):
         if not self._can_enqueue_items():
             raise RuntimeError(
                 "Can't load module onto an eventloop that has been started without a shared EventQueue")
-        if isinstance(getattr(self, '_module_stack', None), LoopModuleStruct):
-            raise RuntimeError(
-                "This loop has already been attached a module, this can only be done once")
-        struct = LoopModuleStruct(self, xpath.abspath(path))
-        self._module_stack = struct
-
-        def import_decoy():
-            get_running_loop()._module_stack.init()
-
-        self.nextTick(import_decoy)
-        return struct.wait(block=block, event_queue=[
-            ['complete', self, self._queue._ended_or_paused]
-        ])
+        structs = []
+        for path in paths:
+            path = xpath.abspath(path)
+            # the first module keeps the loop's name, as it always has, the others add their own
+            name = self._name if not self._module_stack else \
+                f"{self._name}-{xpath.splitext(xpath.basename(path))[0]}"
+            struct = LoopModuleStruct(self, path, name)
+            # compiled up front, so a missing or broken file fails here and not within the loop
+            code = _compile(name, path)
+            self._module_stack.append(struct)
+            structs.append([struct, code])
+        # every module is queued before the loop starts or any of them runs, so their own ticks interleave
+        autostart = self.__autostart
+        self.__autostart = False
+        try:
+            for [struct, code] in structs:
+                # on the top lane, which idle pool workers never steal from, the module belongs to this loop
+                struct.future = self.submit(
+                    _exec_module, struct.name, struct.path, code, priority=PRIORITY_HIGH)
+                struct.future.add_done_callback(struct._settle)
+        finally:
+            self.__autostart = autostart
+        self.__autostartOnce()
+        structs = [struct for [struct, _] in structs]
+        if block:
+            for struct in structs:
+                struct.wait()
+        return structs
 
     def _can_enqueue_items(self):
         """
@@ -308,8 +752,9 @@ class EventLoop(EventEmitter):
           3. If it's not, return False.
           4. Return True if the EventLoop is yet to start.
           5. Otherwise, return True if the active process is the EventLoop.
+        A thread-backed EventLoop takes ticks from any thread of its process.
         """
-        return not self.ended() and self._queue.is_shared() or \
+        return not self.ended() and (self._queue.is_shared() or self.__backend == 'thread' and os.getpid() == self.__owner) or \
             not self.started() or get_current_loop() is self
 
     def set_name(self, name):
@@ -341,6 +786,18 @@ class EventLoop(EventEmitter):
     def paused(self):
         return self._queue.paused() or self._process.paused()
 
+    def spill_stats(self):
+        return self._queue.spill_stats()
+
+    def stats(self, timeout=None):
+        # the profile lives within the loop, so outside of it this costs a round trip
+        if not self._queue._profiler:
+            raise RuntimeError(
+                "profiling is off, construct the EventLoop with profile=True")
+        if get_current_loop(None) is self:
+            return self._queue.profile_stats()
+        return self.submit(_profile_stats, priority=PRIORITY_HIGH).result(timeout)
+
     def __enter__(self):
         self.__with_exit_block = self.__block
         self.__block = False
@@ -362,8 +819,9 @@ class EventLoop(EventEmitter):
 
 
 def get_current_loop(*args, msg=None):
-    loop: EventLoop = getattr(get_current_process(),
-                              '_eventloop', *args or (None,))
+    # thread-backed loops are only visible from their own thread
+    loop: EventLoop = getattr(_local, 'loop', None) or getattr(get_current_process(),
+                                                               '_eventloop', *args or (None,))
     if not (args or loop):
         raise RuntimeError(msg or 'no running event loop')
     else:
@@ -390,7 +848,7 @@ def is_actively_within_module(rt_val=None) -> bool:
     try:
         if not is_within_loop():
             raise RuntimeError("no actively running EventLoop detected")
-        ret = bool(getattr(get_running_loop(), '_module_stack', None))
+        ret = bool(getattr(get_running_loop(), '_modules', None))
         if not ret and rt_val:
             raise RuntimeError(
                 "active EventLoop has not been attached a module")
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+
+"""
+                            rodio:
+Efficient non-blocking event loops for async concurrency and I/O
+          Think of this as AsyncIO on steroids
+"""
+
+import os
+import random
+import asyncio
+import functools
+import itertools
+import multiprocessing
+from .eventloop import EventLoop
+from .rodioprocess import RodioProcess
+from .internals.debug import LogDebugger
+from .internals.completion import get_watcher
+from node_events import EventEmitter
+
+__all__ = ['EventLoopPool']
+
+corelogger = LogDebugger("rodiocore.eventlooppool")
+
+# per worker slots within the shared stats array
+[_EXECUTED, _STOLEN] = range(2)
+
+
+def _tally(counters, slot, *_):
+    counters[slot] += 1
+
+
+def _tally_stolen(counters, slot, count):
+    counters[slot] += count
+
+
+class EventLoopPool(EventEmitter):
+    """
+    A fixed set of EventLoops fed by depth, whose idle workers steal from busy ones
+    """
+
+    @corelogger.debugwrapper
+    def __init__(self, size=None, *, name=None, autostart=True, steal=True, **options):
+        super(EventLoopPool, self).__init__()
+        size = os.cpu_count() if size is None else size
+        if not (isinstance(size, int) and size > 0):
+            raise RuntimeError("<size> parameter must be a positive int")
+        if 'autostart' in options or 'block' in options:
+            raise RuntimeError(
+                "the pool starts its workers itself, <autostart> and <block> only apply to the pool")
+        if options.get('backend', 'process') == 'process' and not options.get('shared_queue', True):
+            raise RuntimeError(
+                "process backed pool workers need shared queues to take ticks from the pool")
+        self._name = name or 'RodioEventLoopPool'
+        self.__autostart = autostart
+        self.__watched = False
+        self.__dispatched = [0] * size
+        # [executed, stolen] per worker, written by the workers themselves
+        self.__counters = multiprocessing.RawArray('q', 2 * size)
+        self._workers = [EventLoop(f'{self._name}-{index}', autostart=False, **options)
+                         for index in range(size)]
+        for (index, worker) in enumerate(self._workers):
+            # rewired into whichever queue replaces a crashed worker's under at least once delivery
+            worker._wire(functools.partial(
+                self.__wire, index, steal and size > 1))
+
+    def __wire(self, index, steal, queue):
+        queue.on('get', functools.partial(
+            _tally, self.__counters, 2 * index + _EXECUTED))
+        queue.on('steal', functools.partial(
+            _tally_stolen, self.__counters, 2 * index + _STOLEN))
+        if steal:
+            # a replacement steals from the others, theirs were forked before it existed
+            # so they hold on to the queue it replaced, which has nothing left to give
+            queue._peers = [peer._queue for (other, peer) in enumerate(
+                self._workers) if other != index]
+
+    def __repr__(self):
+        status = [f"size = {len(self._workers)}"]
+        if self.started():
+            status.append("started")
+        if self.ended():
+            status.append("stopped")
+        return '<%s(%s, %s)>' % (type(self).__name__, self._name, ", ".join(status))
+
+    def __len__(self):
+        return len(self._workers)
+
+    def __iter__(self):
+        return iter(self._workers)
+
+    def __pick(self):
+        # the less loaded of two random workers, which balances about as well
+        # as scanning every queue without its cost on wide pools
+        workers = self._workers
+        if len(workers) == 1:
+            return 0
+        [first, second] = random.sample(range(len(workers)), 2)
+        if workers[second]._queue._lanes.qsize() < workers[first]._queue._lanes.qsize():
+            return second
+        return first
+
+    def __dispatch(self, method, *args, **kwargs):
+        index = self.__pick()
+        ret = getattr(self._workers[index], method)(*args, **kwargs)
+        self.__dispatched[index] += 1
+        self.__autostartOnce()
+        return ret
+
+    def __autostartOnce(self):
+        if self.__autostart and not self.started():
+            self.emit('autostart')
+            self.start()
+
+    def __watchAll(self):
+        # a tick may complete on whichever worker stole it
+        if not self.__watched:
+            self.__watched = True
+            for worker in self._workers:
+                if isinstance(worker._process, RodioProcess):
+                    get_watcher().watch(worker._queue._completions, worker._process)
+
+    @corelogger.debugwrapper
+    def nextTick(self, coro, *args, priority=None, block=True, timeout=None, deadline=None, ttl=None):
+        return self.__dispatch('nextTick', coro, *args, priority=priority, block=block,
+                               timeout=timeout, deadline=deadline, ttl=ttl)
+
+    @corelogger.debugwrapper
+    def submit(self, coro, *args, priority=None, block=True, timeout=None, deadline=None, ttl=None):
+        future = self.__dispatch('submit', coro, *args, priority=priority, block=block,
+                                 timeout=timeout, deadline=deadline, ttl=ttl)
+        self.__watchAll()
+        return future
+
+    async def nextTick_async(self, coro, *args, priority=None, timeout=None, deadline=None, ttl=None):
+        return await self.__dispatch('nextTick_async', coro, *args, priority=priority,
+                                     timeout=timeout, deadline=deadline, ttl=ttl)
+
+    push_async = nextTick_async
+
+    async def submit_async(self, coro, *args, priority=None, timeout=None, deadline=None, ttl=None):
+        self.__watchAll()
+        return await self.__dispatch('submit_async', coro, *args, priority=priority,
+                                     timeout=timeout, deadline=deadline, ttl=ttl)
+
+    @corelogger.debugwrapper
+    def register(self, fn):
+        if self.started():
+            raise RuntimeError(
+                "callables can only be registered with a pool before it starts")
+        # same order everywhere, so every worker knows a callable by the same id
+        for worker in self._workers:
+            worker.register(fn)
+        return fn
+
+    @corelogger.debugwrapper
+    def load_module(self, path: str, *, block=False):
+        return [structs[0] for structs in self.load_modules([path], block=block)]
+
+    @corelogger.debugwrapper
+    def load_modules(self, paths, *, block=False):
+        # one list of structs per worker, the code is compiled once and shipped to all of them
+        structs = [worker.load_modules(paths) for worker in self._workers]
+        self.__autostartOnce()
+        if block:
+            for struct in itertools.chain.from_iterable(structs):
+                struct.is_loaded.wait()
+        return structs
+
+    @corelogger.debugwrapper
+    def start(self):
+        if self.started():
+            raise RuntimeError("EventLoopPool has been previously started")
+        self.emit('start')
+        for worker in self._workers:
+            worker.start()
+
+    @corelogger.debugwrapper
+    def join(self):
+        self.emit('join')
+        for worker in self._workers:
+            worker.join()
+
+    async def join_async(self):
+        self.emit('join')
+        await asyncio.gather(*[worker.join_async() for worker in self._workers])
+
+    def __broadcast(self, method):
+        for worker in self._workers:
+            if not (worker.ended() or worker.end_is_queued()):
+                getattr(worker, method)()
+
+    @corelogger.debugwrapper
+    def scheduleExit(self):
+        self.emit('scheduleExit')
+        self.__broadcast('scheduleExit')
+
+    @corelogger.debugwrapper
+    def scheduleTERM(self):
+        self.emit('scheduleTERM')
+        self.__broadcast('scheduleTERM')
+
+    @corelogger.debugwrapper
+    def scheduleKILL(self):
+        self.emit('scheduleKILL')
+        self.__broadcast('scheduleKILL')
+
+    @corelogger.debugwrapper
+    def terminate(self):
+        self.emit('terminate')
+        self.__broadcast('terminate')
+
+    @corelogger.debugwrapper
+    def kill(self):
+        self.emit('kill')
+        self.__broadcast('kill')
+
+    def stats(self):
+        counters = self.__counters[:]
+        return [{
+            'name': worker.get_name(),
+            'pid': getattr(worker._process, 'pid', None),
+            'queued': worker._queue._lanes.qsize() if not worker.ended() else 0,
+            'dispatched': self.__dispatched[index],
+            'executed': counters[2 * index + _EXECUTED],
+            'stolen': counters[2 * index + _STOLEN],
+            'state': "ended" if worker.ended() else "paused" if worker.paused() else "running",
+        } for (index, worker) in enumerate(self._workers)]
+
+    def get_name(self):
+        return self._name
+
+    getName = get_name
+
+    def started(self):
+        return any(worker.started() for worker in self._workers)
+
+    def ended(self):
+        return all(worker.ended() for worker in self._workers)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, ttype, value, traceback):
+        # every worker finishes what it has queued before leaving the block
+        self.__broadcast('scheduleExit')
+        self.join()
+        return ttype is None
@@ -6,33 +6,267 @@ Efficient non-blocking event loops for async concurrency and I/O
           Think of this as AsyncIO on steroids
 """
 
-import dill
+import os
+import sys
+import math
+import time
 import queue
+import struct
 import asyncio
+import itertools
+import threading
+import traceback
 import multiprocessing
 from node_events import EventEmitter
 from .internals.debug import LogDebugger
+from .internals import sharedbuffers
+from .internals.lanes import PipeLanes, LocalLanes, RingLanes
+from .internals.serializer import get_serializer
+from .internals.completion import get_watcher
+from .internals import uvloopwrapper
 
-__all__ = ['EventQueue']
+__all__ = ['EventQueue',
+           'TickHandle',
+           'PRIORITY_HIGH',
+           'PRIORITY_NORMAL',
+           'PRIORITY_LOW']
 
 corelogger = LogDebugger("rodiocore.eventqueue")
 
+# queue states, readable without locking from any process
+[_RUNNING, _IDLE, _PAUSED, _ENDED] = range(4)
+
+# how long an idle consumer blocks on the queue before rechecking its state
+_IDLE_POLL_INTERVAL = 0.1
+
+# lane indices for the default three lanes, lower drains first
+[PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW] = range(3)
+
+# share of its bounds a full queue has to drain down to before 'lowWater' fires
+_LOW_WATER = 0.5
+
+# prefixed to every serialized tick, [deadline, handle id, ticket pid, ticket n, ticket length, defines size],
+# so the consumer can shed it without deserializing the rest. the definitions of the callables it ships
+# follow on their own, a shed tick still hands them over to the ticks after it that only carry their ids
+_STAMP = struct.Struct('<dqqqbI')
+
+# cancellation marks per queue, a slot holds the handle id of a cancelled tick until the consumer drops it
+_MARK_SLOTS = 4096
+# producers per queue whose taken ticks are tracked, a row holds a pid and the highest count taken per lane
+_PRODUCER_ROWS = 256
+_COUNT_MASK = (1 << 40) - 1
+
+
+def _mark_slot(pid, n):
+    # consecutive counts of one producer spread over the slots, and different producers apart
+    return (n * 0x9E3779B1 + pid) % _MARK_SLOTS
+
+# handle ids are unique across processes, the pid sits above a per process count
+_handles = [os.getpid() << 40, itertools.count(1)]
+
+
+def _reset_handles():
+    _handles[:] = [os.getpid() << 40, itertools.count(1)]
+
+
+os.register_at_fork(after_in_child=_reset_handles)
+
+
+def _outcome(stack, results):
+    return results[0] if len(stack) == 1 else list(results)
+
+
+class _LocalValue:
+    # stands in for a RawValue when no other process reads it
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _acknowledged_only(ticket):
+    # plain ticks tracked for at least once delivery, their failures still end the loop
+    return len(ticket) > 2
+
+
+def _ticket(pid, n, length):
+    return None if not length else (pid, n) if length == 2 else (pid, n, 0)
+
+
+class TickHandle:
+    """
+    Returned for every queued tick, cancels it for as long as the loop hasn't picked it up
+    """
+    __slots__ = ('_queue', '_hid', '_lane', 'deadline')
+
+    def __init__(self, queue, hid, lane, deadline):
+        self._queue = queue
+        self._hid = hid
+        self._lane = lane
+        self.deadline = deadline
+
+    def __repr__(self):
+        return '<%s(%s)>' % (type(self).__name__, self._hid & _COUNT_MASK)
+
+    def cancel(self):
+        return self._queue._cancel(self._hid, self._lane)
+
+
+def _retrieve(future):
+    future.cancelled() or future.exception()
+
+
+class _Expired(Exception):
+    # a coroutine block cancelled on its deadline, told apart from TimeoutErrors of its own
+    pass
+
+
+async def _expiring(gathered, timeout):
+    try:
+        return await asyncio.wait_for(gathered, timeout)
+    except asyncio.TimeoutError:
+        # a cancelled gather holds the CancelledError rather than being cancelled itself
+        if gathered.cancelled() or isinstance(gathered.exception(), asyncio.CancelledError):
+            raise _Expired() from None
+        raise
+
+
+def _footprint(block):
+    # bytes a queued block holds onto, pipe payload and shared memory segments alike
+    if isinstance(block, bytes):
+        return len(block)
+    if isinstance(block, tuple):
+        return len(block[0]) + sum(ref[1] if isinstance(ref, tuple) else len(ref) for ref in block[1])
+    return 0
+
 
 class EventQueue(EventEmitter):
 
     @corelogger.debugwrapper
-    def __init__(self, shared_queue=True):
+    def __init__(self, shared_queue=True, *, drain_batch=32, max_inflight=1, ordered=False, serializer=None, shm_threshold=1 << 20, lanes=3, aging=64, maxsize=None, max_bytes=None, shared_state=None, transport='pipe', ring_size=4 << 20, spill_threshold=None, spill_dir=None, spill_segment_size=64 << 20, profile=None):
         super(EventQueue, self).__init__()
+        if not (isinstance(drain_batch, int) and drain_batch > 0):
+            raise RuntimeError(
+                "<drain_batch> parameter must be a positive int")
+        if not (isinstance(max_inflight, int) and max_inflight > 0):
+            raise RuntimeError(
+                "<max_inflight> parameter must be a positive int")
+        if not (isinstance(lanes, int) and lanes > 0):
+            raise RuntimeError("<lanes> parameter must be a positive int")
+        if aging is not None and not (isinstance(aging, int) and aging > 0):
+            raise RuntimeError(
+                "<aging> parameter must either be None or a positive int")
+        if maxsize is not None and not (isinstance(maxsize, int) and maxsize > 0):
+            raise RuntimeError(
+                "<maxsize> parameter must either be None or a positive int")
+        if max_bytes is not None:
+            if not (isinstance(max_bytes, int) and max_bytes > 0):
+                raise RuntimeError(
+                    "<max_bytes> parameter must either be None or a positive int")
+            if not shared_queue:
+                raise RuntimeError(
+                    "<max_bytes> parameter requires a shared queue, unshared ticks are never serialized")
+        if transport not in ('pipe', 'ring'):
+            raise RuntimeError(
+                "<transport> parameter must either be 'pipe' or 'ring'")
+        if not (isinstance(ring_size, int) and ring_size > 0):
+            raise RuntimeError("<ring_size> parameter must be a positive int")
+        if spill_threshold is not None:
+            if not (isinstance(spill_threshold, int) and spill_threshold >= 0):
+                raise RuntimeError(
+                    "<spill_threshold> parameter must either be None or a non-negative int")
+            if not shared_queue:
+                raise RuntimeError(
+                    "<spill_threshold> parameter requires a shared queue, unshared ticks are never serialized")
+            if spill_dir is not None and not os.path.isdir(spill_dir):
+                raise RuntimeError(
+                    "<spill_dir> parameter must be an existing directory")
+        if not (isinstance(spill_segment_size, int) and spill_segment_size > 0):
+            raise RuntimeError(
+                "<spill_segment_size> parameter must be a positive int")
+        if profile is not None and not (isinstance(profile, int) and profile > 0):
+            raise RuntimeError(
+                "<profile> parameter must either be None or a positive int, profiling one tick out of that many")
         self.__shared_queue = bool(shared_queue)
-        self._ended = multiprocessing.Event()
-        self._started = multiprocessing.Event()
-        self._paused = multiprocessing.Event()
-        self._running = multiprocessing.Event()
-        self._ended_or_paused = multiprocessing.Event()
-        self._statusLock = multiprocessing.Lock()
-        self._queueMgmtLock = multiprocessing.Lock()
-        self._underlayer = queue.Queue(
-        ) if not shared_queue else multiprocessing.JoinableQueue()
+        # whether other processes watch the queue's status, an unshared queue
+        # run within a separate process still needs to report back to its parent
+        self.__shared_state = self.__shared_queue if shared_state is None else bool(
+            shared_state)
+        if self.__shared_queue and not self.__shared_state:
+            raise RuntimeError(
+                "<shared_state> parameter can't be disabled on a shared queue")
+        self.__serializer = get_serializer(
+            serializer) if shared_queue else None
+        if shm_threshold is not None and not (isinstance(shm_threshold, int) and shm_threshold > 0):
+            raise RuntimeError(
+                "<shm_threshold> parameter must either be None or a positive int")
+        # large buffers only go through shared memory with an out-of-band capable serializer
+        self.__shm_threshold = shm_threshold if getattr(
+            self.__serializer, 'out_of_band', False) else None
+        self.__parked = []
+        self.__drain_batch = drain_batch
+        self.__max_inflight = 1 if ordered else max_inflight
+        self.__inflight = set()
+        self.__timers = {}
+        self.__failure = None
+        self.__flushing = False
+        self._completions = None
+        self.__owner = os.getpid()
+        self.__shipped = (self.__owner, [set() for _ in range(lanes)])
+        self.__default_lane = lanes // 2
+        self.__lane_count = lanes
+        # lower lanes passed over this many picks while waiting get served next
+        self.__aging = aging
+        self.__starving = [0] * lanes
+        self.__resolved = {}
+        self.__consumer = None
+        self.__bounds = (maxsize, max_bytes) if maxsize or max_bytes else None
+        if self.__bounds:
+            # [queued ticks, queued bytes, above high water], guarded by __space
+            self.__level = multiprocessing.RawArray('q', 3)
+            self.__space = multiprocessing.Condition()
+            self.__water = multiprocessing.Pipe(duplex=False)
+        self._registry = {}
+        self._registered = {}
+        # queues an idle consumer may steal ticks from, wired up before it starts
+        self._peers = []
+        sync = multiprocessing if self.__shared_state else threading
+        self._state = multiprocessing.RawValue(
+            'b', _RUNNING) if self.__shared_state else _LocalValue(_RUNNING)
+        self._ended = sync.Event()
+        self._started = sync.Event()
+        self._paused = sync.Event()
+        self._running = sync.Event()
+        self._ended_or_paused = sync.Event()
+        self._statusLock = sync.Lock()
+        # the consumer only writes to the pipe once someone armed it, which keeps idling free
+        self.__halts = multiprocessing.Pipe(duplex=False)
+        self.__halt_armed = multiprocessing.RawValue(
+            'b', 0) if self.__shared_state else _LocalValue(0)
+        self.__halt_callbacks = []
+        self.__halt_lock = threading.Lock()
+        # [pid, watcher] relaying the pipes above for this queue, its callbacks keep the queue alive
+        self.__listened = (None, None)
+        # a queue that's consumed within another process is cancelled from this one, even unshared
+        self._queueMgmtLock = multiprocessing.Lock() if self.__shared_state else threading.Lock()
+        # guarded by the lock above, both when cancelling and when taking ticks
+        self.__marks = multiprocessing.RawArray(
+            'q', _MARK_SLOTS) if self.__shared_state else [0] * _MARK_SLOTS
+        self.__producers = multiprocessing.RawArray('q', _PRODUCER_ROWS * (lanes + 1)) \
+            if self.__shared_state else [0] * (_PRODUCER_ROWS * (lanes + 1))
+        # an unshared queue never leaves its process, whatever the transport
+        self._lanes = LocalLanes(lanes) if not shared_queue else RingLanes(
+            lanes, ring_size) if transport == 'ring' else PipeLanes(lanes)
+        self._profiler = None
+        if profile:
+            from .internals.profiler import TickProfiler
+            self._profiler = TickProfiler(profile)
+        self.__spill = spill_threshold is not None
+        if self.__spill:
+            # mmap and tempfile only get imported by queues that can spill
+            from .internals.spill import SpillLanes
+            self._lanes = SpillLanes(self._lanes, spill_threshold, spill_dir,
+                                     spill_segment_size, _footprint)
         self._pause()
 
     def __repr__(self):
@@ -42,97 +276,618 @@ class EventQueue(EventEmitter):
         status.append("ended" if self.ended()
                       else "paused" if self.paused() else "running")
         status.append(f"{'' if self.is_shared() else 'un'}shared")
-        status.append(f"[unfinished = {self._underlayer.qsize()}]" if self._underlayer.qsize(
+        status.append(f"[unfinished = {self._lanes.qsize()}]" if self._lanes.qsize(
         ) else "[complete]" if self.ended() else "[empty]")
         return '<%s(%s)>' % (type(self).__name__, ", ".join(status))
 
     @corelogger.debugwrapper
-    def push(self, coro, args=()):
-        if self.ended():
+    def push(self, coro, args=(), priority=None, ticket=None, block=True, timeout=None, deadline=None):
+        state = self._state.value
+        if state == _ENDED:
             raise RuntimeError(
                 "Can't schedule executions on a stopped eventqueue")
+        lane = self.__default_lane if priority is None else priority
+        if not (isinstance(lane, int) and 0 <= lane < self.__lane_count):
+            raise RuntimeError(
+                f"<priority> parameter must be an int lane between 0 and {self.__lane_count - 1}")
+        if deadline is None:
+            deadline = math.inf
+        elif not isinstance(deadline, (int, float)):
+            raise RuntimeError(
+                "<deadline> parameter must either be None or a time.monotonic() timestamp")
+        [stack, typeid] = self._build_stack(coro)
+        self.emit('push', [stack, args])
+        hid = _handles[0] | next(_handles[1])
+        entry = [stack, args, typeid, deadline, hid, ticket]
+        if self.__shared_queue:
+            [encoded, defines] = self.__encodeStack(stack, lane)
+            shipped = self.__serializer.dumps(defines) if defines else b''
+            stamp = _STAMP.pack(deadline, hid, *(ticket[:2] if ticket else (0, 0)),
+                                len(ticket) if ticket else 0, len(shipped)) + shipped
+            # a single pass over the whole block, the queue only ever sees bytes
+            if self.__shm_threshold:
+                buffers = []
+                entry = stamp + self.__serializer.dumps([encoded, sharedbuffers.wrap_args(
+                    args, self.__shm_threshold), typeid], buffers)
+                if buffers:
+                    entry = (entry, sharedbuffers.export(
+                        buffers, self.__shm_threshold))
+            else:
+                entry = stamp + self.__serializer.dumps(
+                    [encoded, args, typeid])
+        if self.__bounds:
+            try:
+                self.__reserve(_footprint(entry), block, timeout)
+            except:
+                if isinstance(entry, tuple):
+                    sharedbuffers.discard(entry[1])
+                raise
+        try:
+            self._lanes.put(entry, lane, block, timeout)
+        except:
+            if self.__bounds:
+                self.__vacate([entry])
+            if isinstance(entry, tuple):
+                sharedbuffers.discard(entry[1])
+            raise
+        if self.__shared_queue and defines:
+            self.__shipped[1][lane].update(defines)
+        # an active consumer picks this up by itself, only wake idle or paused queues
+        if state != _RUNNING:
+            if corelogger.enabled:
+                corelogger.log("push", "strict resume")
+            try:
+                self._resume()
+            except RuntimeError:
+                # a consumer woken by the tick itself may already have run it and ended, if it was an exit
+                if not self.ended():
+                    raise
+        return TickHandle(self, hid, lane, None if deadline == math.inf else deadline)
+
+    def __row(self, pid, create):
+        # open addressing over the producer rows, rows are never freed so an empty one ends the search,
+        # None when the pid has none and -1 when every row is taken by other producers
+        producers = self.__producers
+        width = self.__lane_count + 1
+        for probe in range(_PRODUCER_ROWS):
+            base = (pid + probe) % _PRODUCER_ROWS * width
+            if producers[base] == pid:
+                return base
+            if not producers[base]:
+                if not create:
+                    return None
+                producers[base] = pid
+                return base
+        return -1
+
+    def _cancel(self, hid, lane):
+        # a producer's ticks are taken in the order they were queued within a lane, so any count up to
+        # the highest taken is past cancelling, and whenever that can't be told for sure nothing is cancelled
+        [pid, n] = [hid >> 40, hid & _COUNT_MASK]
+        slot = _mark_slot(pid, n)
+        with self._queueMgmtLock:
+            if self._state.value == _ENDED:
+                return False
+            base = self.__row(pid, False)
+            if base == -1 or base is not None and self.__producers[base + 1 + lane] >= n:
+                return False
+            if self.__marks[slot]:
+                # already cancelled, or the slot is held by another cancelled tick still queued
+                return False
+            self.__marks[slot] = hid
+            return True
+
+    def __admit(self, batch, lanes):
+        # reads the stamps only, cancelled and expired ticks are dropped without being
+        # deserialized and every other one is recorded as taken, past cancelling
+        marks = self.__marks
+        producers = self.__producers
+        rows = {}
+        now = time.monotonic()
+        admitted = []
+        for (entry, lane) in zip(batch, lanes):
+            if self.__shared_queue:
+                [deadline, hid, pid, n, length, _] = _STAMP.unpack_from(
+                    entry[0] if isinstance(entry, tuple) else entry)
+                ticket = _ticket(pid, n, length)
+            else:
+                [deadline, hid, ticket] = entry[3:]
+            [pid, n] = [hid >> 40, hid & _COUNT_MASK]
+            base = rows.get(pid)
+            if base is None:
+                base = rows[pid] = self.__row(pid, True)
+            if base != -1 and producers[base + 1 + lane] < n:
+                producers[base + 1 + lane] = n
+            slot = _mark_slot(pid, n)
+            if marks[slot] == hid:
+                marks[slot] = 0
+                dropped = 'cancel'
+            elif deadline <= now:
+                dropped = 'expire'
+            else:
+                dropped = None
+            if isinstance(entry, tuple):
+                if dropped:
+                    sharedbuffers.discard(entry[1])
+                else:
+                    # mapped and unlinked as soon as it's taken, a consumer that dies before
+                    # getting to the tick leaves no segment behind
+                    entry = (entry[0], sharedbuffers.attach(entry[1]))
+            admitted.append((entry, deadline, ticket, dropped))
+        return admitted
+
+    def __reserve(self, size, block, timeout):
+        [maxsize, max_bytes] = self.__bounds
+        level = self.__level
+        if (os.getpid(), threading.get_ident()) == self.__consumer:
+            # the loop can't wait on itself to make room
+            block = False
+
+        def fits():
+            return not level[0] or (maxsize is None or level[0] < maxsize) and \
+                (max_bytes is None or level[1] + size <= max_bytes)
+
+        with self.__space:
+            admitted = fits() or block and self.__space.wait_for(
+                lambda: fits() or self._state.value == _ENDED, timeout) and self._state.value != _ENDED
+            if admitted:
+                level[0] += 1
+                level[1] += size
+            rising = not level[2] and not (admitted and fits())
+            if rising:
+                level[2] = 1
+        if rising:
+            self.__listen(self.__water[0], self.__lowWater)
+            self.emit('highWater')
+        if not admitted:
+            if self._state.value == _ENDED:
+                raise RuntimeError(
+                    "Can't schedule executions on a stopped eventqueue")
+            raise queue.Full(
+                f"eventqueue is full [maxsize = {maxsize}, max_bytes = {max_bytes}]")
+
+    def __vacate(self, batch):
+        [maxsize, max_bytes] = self.__bounds
+        level = self.__level
+        with self.__space:
+            level[0] -= len(batch)
+            level[1] -= sum(map(_footprint, batch))
+            falling = level[2] and (maxsize is None or level[0] <= maxsize * _LOW_WATER) and \
+                (max_bytes is None or level[1] <= max_bytes * _LOW_WATER)
+            if falling:
+                level[2] = 0
+            self.__space.notify_all()
+        if falling:
+            # producers hear of this through their watcher thread
+            self.__water[1].send_bytes(b'')
+
+    def __halted(self):
+        if self.__halt_armed.value:
+            self.__halt_armed.value = 0
+            # producers hear of this through their watcher thread
+            self.__halts[1].send_bytes(b'')
+
+    def _onHalt(self, callback):
+        """
+        Call back once, from the watcher thread, when the queue next ends or pauses
+        """
+        with self.__halt_lock:
+            self.__halt_callbacks.append(callback)
+            self.__listen(self.__halts[0], self.__relayHalt)
+        self.__halt_armed.value = 1
+        # the consumer may have halted before it saw the queue armed
+        if self._ended_or_paused.is_set():
+            self.__relayHalt()
+
+    def __relayHalt(self):
+        while self.__halts[0].poll():
+            self.__halts[0].recv_bytes()
+        with self.__halt_lock:
+            [callbacks, self.__halt_callbacks] = [self.__halt_callbacks, []]
+            # listened to again by whoever arms the queue next
+            self.__unlisten(self.__halts[0])
+        for callback in callbacks:
+            callback()
+
+    def __listen(self, reader, callback):
+        watcher = get_watcher()
+        self.__listened = (os.getpid(), watcher)
+        watcher.listen(reader, callback, self._completions)
+
+    def __unlisten(self, *readers):
+        [pid, watcher] = self.__listened
+        # a forked copy of the queue holds its parent's watcher, which isn't its own to touch
+        if pid == os.getpid():
+            for reader in readers:
+                watcher.unlisten(reader)
+
+    def __lowWater(self):
+        while self.__water[0].poll():
+            self.__water[0].recv_bytes()
+        self.emit('lowWater')
+
+    def _build_stack(self, coro):
+        if not isinstance(coro, (tuple, list)):
+            # the common single callable case, without the collection checks
+            if asyncio.iscoroutinefunction(coro):
+                return [[coro], 1]
+            if callable(coro):
+                return [[coro], 0]
         stack = list(coro if isinstance(coro, (tuple, list)) else [coro])
         notpassed = list(filter(lambda x: not callable(x), stack))
         if notpassed:
             raise RuntimeError(
                 f"{notpassed} item{' defined must' if len(notpassed) == 1 else 's defined must all'} either be a coroutine function or a callable object")
-        [stack, typeid] = self.__checkAll(asyncio.iscoroutinefunction, stack, [stack, 1]) or \
+        return self.__checkAll(asyncio.iscoroutinefunction, stack, [stack, 1]) or \
             self.__checkAll(callable, stack, [stack, 0])
-        if self.__shared_queue:
-            stack = dill.dumps(stack)
 
-        corelogger.log("push", "acquiring to push...")
-        with self._queueMgmtLock:
-            corelogger.log("push", "acquired to push")
-            corelogger.log("push pre  put len", self._underlayer.qsize())
-            self.emit('push', [stack, args])
-            self._underlayer.put([stack, args, typeid])
-            corelogger.log("push post put len", self._underlayer.qsize())
-            corelogger.log("push", "strict resume")
-            self._resume()
-
-    def __stripCoros(self):
-        while not self.ended():
+    @corelogger.debugwrapper
+    def register(self, fn):
+        if not callable(fn):
+            raise TypeError("only callable objects can be registered")
+        if os.getpid() != self.__owner:
+            raise RuntimeError(
+                "callables can only be registered from the process that created the eventqueue")
+        if fn not in self._registry:
+            fid = len(self._registered)
+            self._registry[fn] = fid
+            self._registered[fid] = fn
+        return fn
+
+    def __encodeStack(self, stack, lane):
+        if not self._registry:
+            return [stack, None]
+        if self.__shipped[0] != os.getpid():
+            # every producing process ships a callable's definition on its first use
+            # in each lane, so no lane can overtake the tick that carries it
+            self.__shipped = (os.getpid(), [set() for _ in self._lanes.sizes()])
+        [encoded, defines] = [[], None]
+        for fn in stack:
             try:
-                corelogger.log("__stripCoros", "acquiring to begin extract")
-                if self._running.wait():
-                    corelogger.log(
-                        "__stripCoros", "acquired to begin extract!")
-                    corelogger.log("__stripCoros", "acquiring to get...")
-                    with self._queueMgmtLock:
-                        corelogger.log("__stripCoros", "acquired to get")
-                        if self._underlayer.qsize() == 0:
-                            raise queue.Empty
-                        corelogger.log("__stripCoros pre  get len",
-                                       self._underlayer.qsize())
-                        block = self._underlayer.get()
-                        self.emit('get', block[:2])
-                        corelogger.log("__stripCoros post get len",
-                                       self._underlayer.qsize())
-                        self._underlayer.task_done()
-                    yield block
-                else:
-                    corelogger.log("__stripCoros", "run timeout")
-            except queue.Empty:
-                with self._queueMgmtLock:
-                    corelogger.log("__stripCoros empty", "queue empty")
-                    corelogger.log("__stripCoros empty get len",
-                                   self._underlayer.qsize())
-                    if not self.ended():
-                        if self._underlayer.qsize() > 0:
-                            corelogger.log(
-                                "__stripCoros empty", "skipping pause after detecting items in queue")
-                        else:
-                            corelogger.log(
-                                "__stripCoros empty", "pausing on queue empty")
-                            self._pause()
+                fid = self._registry.get(fn)
+            except TypeError:
+                fid = None
+            if fid is None:
+                encoded.append(fn)
+                continue
+            if fid not in self.__shipped[1][lane]:
+                defines = defines or {}
+                defines[fid] = fn
+            encoded.append(fid)
+        return [encoded, defines]
+
+    def __define(self, data):
+        # takes in the definitions a tick ships, dropped or not, returns where the rest of it starts
+        size = _STAMP.unpack_from(data)[-1]
+        if size:
+            self.__resolved.update(self.__serializer.loads(
+                data[_STAMP.size:_STAMP.size + size]))
+        return _STAMP.size + size
+
+    def __decode(self, block):
+        if isinstance(block, tuple):
+            [block, [buffers, _]] = block
+            data = memoryview(block)
+            [stack, args, typeid] = self.__serializer.loads(
+                data[self.__define(data):], buffers)
+        else:
+            data = memoryview(block)
+            [stack, args, typeid] = self.__serializer.loads(
+                data[self.__define(data):])
+        return [self.__decodeStack(stack), args, typeid]
+
+    def __decodeStack(self, stack):
+        if not (self.__resolved or self._registered):
+            return stack
+        decoded = []
+        for fn in stack:
+            if isinstance(fn, int):
+                fid, fn = fn, self.__resolved.get(fn) or self._registered.get(fn)
+                if fn is None:
+                    raise RuntimeError(
+                        f"no registered callable is known by the id [{fid}]")
+            decoded.append(fn)
+        return decoded
+
+    def __drain(self):
+        if self.__parked:
+            self.__parked = [
+                lease for lease in self.__parked if not lease.release()]
+        with self._queueMgmtLock:
+            sizes = self._lanes.sizes()
+            if corelogger.enabled:
+                corelogger.log("__drain pre  get len", sizes)
+            lanes = self.__schedule(sizes)
+            batch = [self._lanes.get(lane) for lane in lanes]
+            admitted = self.__admit(batch, lanes)
+        if batch and self.__bounds:
+            self.__vacate(batch)
+        batch = admitted
+        if not batch and self._peers:
+            batch = self.__steal()
+        if not batch and not self._lanes.linger():
+            # nothing ready, go idle and block on the lanes themselves until a push lands
+            self._idle()
+            if self._lanes.wait(_IDLE_POLL_INTERVAL):
+                self._wake()
+        return batch
+
+    def __steal(self):
+        victim = max(self._peers, key=lambda peer: peer._lanes.qsize())
+        batch = victim._surrender(self.__drain_batch)
+        if batch:
+            if corelogger.enabled:
+                corelogger.log("__steal", len(batch))
+            self.emit('steal', len(batch))
+        return batch
+
+    def _surrender(self, limit):
+        # hands over at most half of each lane, never a lane's last tick nor anything on the
+        # top lane, so timers and scheduled exits queued last stay with this queue
+        with self._queueMgmtLock:
+            sizes = self._lanes.sizes()
+            lanes = []
+            for lane in range(1 if len(sizes) > 1 else 0, len(sizes)):
+                lanes.extend([lane] * min(sizes[lane] // 2, limit - len(lanes)))
+            batch = [self._lanes.get(lane) for lane in lanes]
+            admitted = self.__admit(batch, lanes)
+        if batch and self.__bounds:
+            self.__vacate(batch)
+        return admitted
+
+    def __schedule(self, sizes):
+        nonempty = [lane for (lane, size) in enumerate(sizes) if size]
+        if len(nonempty) < 2:
+            return [lane for lane in nonempty for _ in range(min(sizes[lane], self.__drain_batch))]
+        picks = []
+        starving = self.__starving
+        while len(picks) < self.__drain_batch:
+            lane = next((index for index in range(len(sizes))
+                         if sizes[index] and self.__aging and starving[index] >= self.__aging), None)
+            if lane is None:
+                lane = next((index for index in range(len(sizes))
+                             if sizes[index]), None)
+                if lane is None:
+                    break
+            picks.append(lane)
+            sizes[lane] -= 1
+            for index in range(lane + 1, len(sizes)):
+                if sizes[index]:
+                    starving[index] += 1
+            starving[lane] = 0
+        return picks
+
+    async def __stripCoros(self):
+        while True:
+            if self.__failure:
+                raise self.__failure
+            state = self._state.value
+            if state == _ENDED:
+                break
+            if state == _PAUSED:
+                if corelogger.enabled:
+                    corelogger.log("__stripCoros", "waiting on resume")
+                await self.__offload(self.__awaitResume)
+                continue
+            self.__flush()
+            for block in await self.__offload(self.__drain):
+                # a tick within this batch may have paused or ended the queue
+                if self._state.value != _RUNNING and not await self.__offload(self.__awaitResume):
+                    break
+                yield block
+
+    async def __offload(self, fn):
+        # blocking waits stall the asyncio loop, so hand them off to a thread
+        # whenever there are coroutine blocks in flight or timers that need it running
+        if not (self.__inflight or self.__timers):
+            return fn()
+        return await asyncio.get_running_loop().run_in_executor(None, fn)
+
+    def __awaitResume(self):
+        while not self._running.wait(_IDLE_POLL_INTERVAL):
+            if self._state.value == _ENDED:
+                return False
+        return True
 
     async def _startIterator(self):
-        corelogger.log('async __startIterator init')
-        for [stack, args, typeid] in self.__stripCoros():
+        if corelogger.enabled:
+            corelogger.log('async __startIterator init')
+        slots = asyncio.Semaphore(self.__max_inflight)
+        profiler = self._profiler
+        async for [block, deadline, ticket, dropped] in self.__stripCoros():
+            if not dropped and deadline != math.inf and deadline <= time.monotonic():
+                # taken in time, but the ticks ahead of it within its batch ran late
+                if isinstance(block, tuple):
+                    self.__release(block[1][1])
+                dropped = 'expire'
+            if dropped:
+                if self.__shared_queue:
+                    self.__define(memoryview(
+                        block[0] if isinstance(block, tuple) else block))
+                self.__drop(ticket, dropped)
+                continue
+            lease = None
             if self.__shared_queue:
-                stack = dill.loads(stack)
-            if typeid == 0:
+                if isinstance(block, tuple):
+                    lease = block[1][1]
+                try:
+                    [stack, args, typeid] = self.__decode(block)
+                except Exception as e:
+                    # a tick that can't be decoded fails on its own, the ticks around it still run
+                    self.__release(lease)
+                    self.__reject(ticket, e)
+                    continue
+            else:
+                [stack, args, typeid] = block[:3]
+            self.emit('get', [stack, args])
+            profiled = profiler is not None and profiler.sampled()
+            if typeid == 1 and self.__max_inflight > 1:
+                await slots.acquire()
+                self.__dispatch(slots, stack, args, lease,
+                                ticket, deadline, profiled)
+            else:
+                try:
+                    if typeid == 0:
+                        results = [profiler.call(fn, args) for fn in stack] if profiled else [
+                            fn(*args) for fn in stack]
+                    elif typeid == 1:
+                        results = await self.__bounded(asyncio.gather(*self.__coros(stack, args, profiled)), deadline)
+                except SystemExit:
+                    # an exit tick still comes after every block queued ahead of it, in flight or not
+                    if self.__inflight:
+                        await asyncio.wait(set(self.__inflight))
+                        self.__flush()
+                    raise
+                except Exception as e:
+                    if isinstance(e, _Expired):
+                        self.__drop(ticket, 'expire')
+                        continue
+                    # submitted ticks hand their failures back to the caller instead
+                    if ticket is None:
+                        raise
+                    self.__complete(ticket, False, e)
+                    if _acknowledged_only(ticket):
+                        self.__flush()
+                        raise
+                else:
+                    if ticket is not None:
+                        self.__complete(ticket, True, _outcome(stack, results))
+                finally:
+                    self.__release(lease)
+            if self.__failure:
+                raise self.__failure
+        if corelogger.enabled:
+            corelogger.log('async __startIterator exit')
+
+    def __bounded(self, awaitable, deadline):
+        # sync callables can't be interrupted, coroutine blocks get cancelled on their deadline
+        if deadline == math.inf:
+            return awaitable
+        # a gather cancelled on its deadline ends up holding a CancelledError nobody awaits
+        gathered = asyncio.ensure_future(awaitable)
+        gathered.add_done_callback(_retrieve)
+        return _expiring(gathered, deadline - time.monotonic())
+
+    def __drop(self, ticket, reason):
+        self.emit(reason)
+        if ticket is not None:
+            self.__complete(ticket, False, asyncio.CancelledError() if reason == 'cancel'
+                            else TimeoutError("the tick ran past its deadline"))
+
+    def __reject(self, ticket, error):
+        if ticket is None or _acknowledged_only(ticket):
+            # nothing waits on its result to hear of it
+            print("a tick couldn't be decoded and was dropped", file=sys.stderr)
+            traceback.print_exception(type(error), error, error.__traceback__)
+        if ticket is not None:
+            self.__complete(ticket, False, error)
+
+    def __coros(self, stack, args, profiled=False):
+        if profiled:
+            return [self._profiler.meter(corofn, corofn(*args)) for corofn in stack]
+        return [corofn(*args) for corofn in stack]
+
+    def __dispatch(self, slots, stack, args, lease, ticket, deadline, profiled):
+        task = self.__spawn(stack, args, ticket, deadline, profiled)
+
+        def release(task):
+            slots.release()
+            self.__release(lease)
+        task.add_done_callback(release)
+
+    def __spawn(self, stack, args, ticket=None, deadline=math.inf, profiled=False):
+        task = asyncio.ensure_future(self.__bounded(
+            asyncio.gather(*self.__coros(stack, args, profiled)), deadline))
+        self.__inflight.add(task)
+
+        def settle(task):
+            self.__inflight.discard(task)
+            if not task.cancelled() and isinstance(task.exception(), _Expired):
+                self.__drop(ticket, 'expire')
+                return
+            if ticket is not None:
+                if task.cancelled():
+                    self.__complete(ticket, False, asyncio.CancelledError())
+                elif task.exception():
+                    self.__complete(ticket, False, task.exception())
+                else:
+                    self.__complete(ticket, True, _outcome(
+                        stack, task.result()))
+            if (ticket is None or _acknowledged_only(ticket)) and not (task.cancelled() or self.__failure):
+                self.__failure = task.exception()
+        task.add_done_callback(settle)
+        return task
+
+    def __complete(self, ticket, ok, value):
+        self._completions.report(ticket, ok, value)
+        if not self.__flushing:
+            # completions landing within the same loop iteration go out together
+            self.__flushing = True
+            asyncio.get_running_loop().call_soon(self.__flush)
+
+    def __flush(self):
+        self.__flushing = False
+        if self._completions:
+            self._completions.flush()
+
+    def _set_timer(self, timer_id, due, interval, stack, typeid, args):
+        loop = asyncio.get_running_loop()
+
+        def arm(due):
+            self.__timers[timer_id] = loop.call_later(
+                max(due - time.monotonic(), 0), fire, due)
+
+        def fire(due):
+            # the loop's own clock is coarser, it may call back up to a millisecond early
+            now = time.monotonic()
+            if now < due:
+                arm(due)
+                return
+            if interval is None:
+                self.__timers.pop(timer_id, None)
+            else:
+                # counted from when it was due rather than when it fired, so intervals don't drift
+                arm(max(due + interval, now))
+            if typeid == 1:
+                self.__spawn(stack, args)
+                return
+            try:
                 [fn(*args) for fn in stack]
-            elif typeid == 1:
-                await asyncio.gather(*[corofn(*args) for corofn in stack])
-        corelogger.log('async __startIterator exit')
+            except BaseException as e:
+                self.__failure = self.__failure or e
+        self._clear_timer(timer_id)
+        arm(due)
+
+    def _clear_timer(self, timer_id):
+        handle = self.__timers.pop(timer_id, None)
+        if handle:
+            handle.cancel()
+
+    def __release(self, lease):
+        # views kept by the callables pin their segments until they let go
+        if lease and not lease.release():
+            self.__parked.append(lease)
 
     @corelogger.debugwrapper
     def _resume(self):
         self.__checkActivityElseRaise()
-        corelogger.log("_resume", "acquiring to resume...")
+        if corelogger.enabled:
+            corelogger.log("_resume", "acquiring to resume...")
         with self._statusLock:
-            corelogger.log("_resume", "acquired to resume")
+            if corelogger.enabled:
+                corelogger.log("_resume", "acquired to resume")
+            self._state.value = _RUNNING
             self._paused.clear()
             self._running.set()
             self._ended_or_paused.clear()
 
     def start(self):
+        self.__consumer = (os.getpid(), threading.get_ident())
+        self._lanes.consumer = self.__consumer
         self._started.set()
         self.emit('start')
         self._resume()
-        asyncio.run(self._startIterator())
+        uvloopwrapper.run(self._startIterator())
 
     @corelogger.debugwrapper
     def resume(self):
@@ -141,12 +896,35 @@ class EventQueue(EventEmitter):
 
     def _pause(self):
         self.__checkActivityElseRaise()
-        corelogger.log("_pause", "acquiring to pause...")
+        if corelogger.enabled:
+            corelogger.log("_pause", "acquiring to pause...")
         with self._statusLock:
-            corelogger.log("_pause", "acquired to pause")
+            if corelogger.enabled:
+                corelogger.log("_pause", "acquired to pause")
+            self._state.value = _PAUSED
             self._paused.set()
             self._running.clear()
             self._ended_or_paused.set()
+        self.__halted()
+
+    def _idle(self):
+        if self._state.value == _RUNNING:
+            with self._statusLock:
+                if self._state.value == _RUNNING:
+                    if corelogger.enabled:
+                        corelogger.log("_idle", "pausing on queue empty")
+                    self._state.value = _IDLE
+                    self._paused.set()
+                    self._ended_or_paused.set()
+            self.__halted()
+
+    def _wake(self):
+        if self._state.value == _IDLE:
+            with self._statusLock:
+                if self._state.value == _IDLE:
+                    self._state.value = _RUNNING
+                    self._paused.clear()
+                    self._ended_or_paused.clear()
 
     @corelogger.debugwrapper
     def pause(self):
@@ -155,18 +933,52 @@ class EventQueue(EventEmitter):
 
     def _end(self):
         self.__checkActivityElseRaise()
+        self._state.value = _ENDED
         with self._running._cond:
             self._running._cond.notify()
         self._ended.set()
         self._paused.clear()
         self._running.clear()
         self._ended_or_paused.set()
+        self.__halted()
+        # producers waiting on a full ring get let go too
+        self._lanes.close()
+        self._discard()
+        if self.__spill:
+            self._lanes.discard()
+        if self.__bounds:
+            # producers blocked on a full queue won't ever see it drain now
+            with self.__space:
+                self.__space.notify_all()
 
     @corelogger.debugwrapper
     def end(self):
         self._end()
         self.emit('end')
 
+    def _discard(self):
+        """
+        Drop whatever is still queued once nobody is left to run it, unlinking the shared
+        memory segments its ticks were carrying
+        """
+        # nothing is relayed from an ended queue, and the watcher lets go of it
+        self.__unlisten(self.__halts[0])
+        if self.__bounds:
+            self.__unlisten(self.__water[0])
+        if not (self.__shared_queue and self.__shm_threshold):
+            return
+        # a consumer killed while holding the lock never lets go of it
+        locked = self._queueMgmtLock.acquire(timeout=_IDLE_POLL_INTERVAL)
+        try:
+            for (lane, size) in enumerate(self._lanes.sizes()):
+                for _ in range(size):
+                    entry = self._lanes.get(lane)
+                    if isinstance(entry, tuple):
+                        sharedbuffers.discard(entry[1])
+        finally:
+            if locked:
+                self._queueMgmtLock.release()
+
     def __checkActivityElseRaise(self):
         if self.ended():
             raise RuntimeError("Queue iterator already ended")
@@ -183,8 +995,14 @@ class EventQueue(EventEmitter):
             raise RuntimeError(
                 'Collection of executors must pass the condition')
 
+    def spill_stats(self):
+        return self._lanes.stats() if self.__spill else None
+
+    def profile_stats(self):
+        return self._profiler.stats() if self._profiler else None
+
     def paused(self):
-        return self._paused.is_set() and not self._running.is_set()
+        return self._state.value in (_IDLE, _PAUSED)
 
     is_paused = paused
     has_paused = paused
@@ -193,7 +1011,7 @@ class EventQueue(EventEmitter):
         return self._started.is_set()
 
     def ended(self):
-        return self._ended.is_set()
+        return self._state.value == _ENDED
 
     def is_shared(self):
         return self.__shared_queue
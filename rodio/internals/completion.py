@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+"""
+                            rodio:
+Efficient non-blocking event loops for async concurrency and I/O
+          Think of this as AsyncIO on steroids
+"""
+
+import os
+import itertools
+import threading
+import traceback
+import multiprocessing
+import multiprocessing.connection
+from .serializer import AutoSerializer
+
+__all__ = ['CompletionChannel', 'get_watcher']
+
+_tickets = itertools.count()
+
+# ticket -> [future, channel], for every tick submitted from this process
+_futures = {}
+# a forked loop inherits its parent's pending ticks, they're the parent's to settle, not its own
+os.register_at_fork(after_in_child=_futures.clear)
+
+
+def _settle(ticket, ok, value):
+    slot = _futures.pop(ticket, None)
+    if slot is None:
+        return
+    # the tick is done with, at least once delivery has nothing left to replay
+    slot[1]._envelopes.pop(ticket, None)
+    if slot[0] is None or slot[0].done():
+        return
+    if ok:
+        slot[0].set_result(value)
+    else:
+        slot[0].set_exception(value)
+
+
+class CompletionChannel:
+    """
+    Carries tick results from a loop back to the process that submitted them,
+    through one pipe per loop with completions sent over in batches
+    """
+
+    def __init__(self):
+        (self._reader, self._writer) = multiprocessing.Pipe(duplex=False)
+        self._serializer = AutoSerializer()
+        self._pending = []
+        self._process = None
+        self._receiving = threading.Lock()
+        # ticket -> envelope, for ticks to replay should the loop crash before finishing them
+        self._envelopes = {}
+        # called by the watcher once the loop is gone, returns True if it brought up a replacement
+        self.supervisor = None
+
+    def expect(self, future, envelope=None):
+        # ticks only tracked for acknowledgement carry a third member, nothing waits on their result
+        ticket = (os.getpid(), next(_tickets)) if future is not None else (
+            os.getpid(), next(_tickets), 0)
+        _futures[ticket] = [future, self]
+        if envelope is not None:
+            self._envelopes[ticket] = envelope
+        return ticket
+
+    def forget(self, ticket):
+        _futures.pop(ticket, None)
+        self._envelopes.pop(ticket, None)
+
+    def adopt(self, channel):
+        # takes over every outstanding tick of a channel whose loop was replaced
+        with channel._receiving:
+            self._envelopes.update(channel._envelopes)
+            channel._envelopes.clear()
+        for (ticket, slot) in list(_futures.items()):
+            if slot[1] is channel:
+                slot[1] = self
+
+    def report(self, ticket, ok, value):
+        if len(ticket) > 2:
+            value = None
+        elif not ok and isinstance(value, BaseException) and hasattr(value, 'add_note'):
+            value.add_note(''.join(traceback.format_exception(
+                type(value), value, value.__traceback__)).rstrip())
+        if ticket[0] == os.getpid():
+            # submitted from within the loop itself, no need for a round trip
+            _settle(ticket, ok, value)
+        else:
+            self._pending.append((ticket, ok, value))
+
+    def flush(self):
+        if not self._pending:
+            return
+        [batch, self._pending] = [self._pending, []]
+        try:
+            data = self._serializer.dumps(batch)
+        except Exception:
+            data = self._serializer.dumps(
+                [self.__portable(completion) for completion in batch])
+        self._writer.send_bytes(data)
+
+    def __portable(self, completion):
+        try:
+            self._serializer.dumps(completion)
+        except Exception as e:
+            return (completion[0], False, RuntimeError(
+                f"result of the tick couldn't be serialized: {e!r}"))
+        return completion
+
+    def receive(self):
+        with self._receiving:
+            while self._reader.poll():
+                for (ticket, ok, value) in self._serializer.loads(self._reader.recv_bytes()):
+                    _settle(ticket, ok, value)
+
+    def abandon(self, reason):
+        for (ticket, [future, channel]) in list(_futures.items()):
+            if channel is self:
+                _settle(ticket, False, RuntimeError(reason))
+
+    def sentinel(self):
+        try:
+            return self._process.sentinel
+        except (AttributeError, ValueError):
+            return None
+
+
+class CompletionWatcher:
+    """
+    A single thread per process that resolves futures for every watched loop,
+    and relays the watermark events of bounded queues
+    """
+
+    def __init__(self):
+        self._channels = set()
+        self._listeners = {}
+        self._lock = threading.Lock()
+        (self._wakeup_reader, self._wakeup_writer) = multiprocessing.Pipe(
+            duplex=False)
+        self._thread = None
+
+    def watch(self, channel, process):
+        with self._lock:
+            channel._process = process
+            if channel in self._channels:
+                return
+            self._channels.add(channel)
+            self.__ensure_thread()
+        self._wakeup_writer.send_bytes(b'')
+
+    def listen(self, reader, callback, channel=None):
+        """
+        Call back from the watcher thread whenever the reader has data, until unlistened
+        or the loop behind the given channel exits
+        """
+        with self._lock:
+            if reader in self._listeners:
+                return
+            self._listeners[reader] = (callback, channel)
+            self.__ensure_thread()
+        self._wakeup_writer.send_bytes(b'')
+
+    def unlisten(self, reader):
+        with self._lock:
+            if self._listeners.pop(reader, None) is None:
+                return
+        self._wakeup_writer.send_bytes(b'')
+
+    def __ensure_thread(self):
+        if not self._thread:
+            self._thread = threading.Thread(
+                target=self._run, name='RodioCompletionWatcher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                channels = list(self._channels)
+                listeners = dict(self._listeners)
+            readers = {channel._reader: channel for channel in channels}
+            sentinels = {}
+            for channel in channels:
+                sentinel = channel.sentinel()
+                if sentinel is not None:
+                    sentinels[sentinel] = channel
+            # loops that have yet to start have no sentinel to wait on, recheck them periodically
+            timeout = None if len(sentinels) == len(channels) else 0.5
+            for ready in multiprocessing.connection.wait(
+                    [self._wakeup_reader, *readers, *sentinels, *listeners], timeout):
+                if ready is self._wakeup_reader:
+                    while self._wakeup_reader.poll():
+                        self._wakeup_reader.recv_bytes()
+                elif ready in readers:
+                    readers[ready].receive()
+                elif ready in listeners:
+                    listeners[ready][0]()
+                else:
+                    channel = sentinels[ready]
+                    channel.receive()
+                    if not (channel.supervisor and channel.supervisor()):
+                        channel.abandon(
+                            "the event loop exited before completing the tick")
+                    with self._lock:
+                        self._channels.discard(channel)
+                        # nothing is left to write to the readers of an exited loop
+                        for (reader, [_, owner]) in list(self._listeners.items()):
+                            if owner is channel:
+                                del self._listeners[reader]
+
+
+_watcher = [None, None]
+
+
+def get_watcher():
+    if _watcher[1] != os.getpid():
+        _watcher[:] = [CompletionWatcher(), os.getpid()]
+    return _watcher[0]
@@ -1,6 +1,10 @@
+import os
 import sys
+import time
+import atexit
+import threading
+import collections
 import rodio
-from datetime import datetime
 
 
 """
@@ -18,6 +22,64 @@ def hasArg(*args):
 
 debugLoggers = {}
 
+# read once, the command line doesn't change under a running process
+SHOW_ID = hasArg("--DEBUG-SHOW-ID")
+SHOW_PROCESS = hasArg('--DEBUG-SHOW-PROCESS')
+
+# how many records a process holds before the oldest get overwritten, and how often they're written out
+RING_SIZE = 1 << 16
+FLUSH_INTERVAL = 0.05
+
+
+class _Ring:
+    # records are appended by whichever thread logs, deque appends being atomic need no lock,
+    # and a single background thread formats and prints them
+    def __init__(self):
+        self._records = collections.deque(maxlen=RING_SIZE)
+        self._thread = None
+        self._pid = None
+
+    def append(self, record):
+        if self._pid != os.getpid():
+            self.__start()
+        self._records.append(record)
+
+    def __start(self):
+        # a forked child inherits neither the parent's thread nor its pending records
+        self._pid = os.getpid()
+        self._records.clear()
+        self._thread = threading.Thread(
+            target=self.__run, name='RodioDebugFlusher', daemon=True)
+        self._thread.start()
+        # loop processes leave through os._exit, which skips atexit handlers
+        import multiprocessing.util
+        multiprocessing.util.Finalize(None, self.flush, exitpriority=0)
+
+    def __run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        records = self._records
+        if not records:
+            return
+        from datetime import datetime
+        while records:
+            try:
+                [stamp, printer, idslot, fn, message] = records.popleft()
+            except IndexError:
+                break
+            printer(
+                f'[\x1b[33mDEBUG\x1b[0m@\x1b[34m{datetime.fromtimestamp(stamp).strftime("%T")}\x1b[0m]{idslot}[\x1b[32m{fn}\x1b[0m]{message}')
+        sys.stdout.flush()
+
+
+_ring = _Ring()
+atexit.register(_ring.flush)
+# whatever the parent logged goes out before a fork, not twice from both sides of it
+os.register_at_fork(before=_ring.flush)
+
 
 class LogDebugger:
     def __init__(self, identifier=None):
@@ -25,21 +87,24 @@ class LogDebugger:
             raise ValueError(
                 "The identifier for the debugger already exists within the stack")
         self.__debug_id__ = identifier
-        self.__printer = rodio.printfromprocess if hasArg(
-            '--DEBUG-SHOW-PROCESS') else print
-        self.__clearedToPrint = hasArg(
+        self.__printer = rodio.printfromprocess if SHOW_PROCESS else print
+        self.__idslot = f" (\x1b[36m{identifier}\x1b[0m) " if SHOW_ID else " "
+        # call sites check this before logging, so disabled loggers cost a single attribute read
+        self.enabled = hasArg(
             '--DEBUG', *(f'--DEBUG={identifier}',) if identifier else ())
         debugLoggers[identifier] = self
 
     def log(self, fn, *args):
-        if self.__clearedToPrint:
-            idslot = f" (\x1b[36m{self.__debug_id__}\x1b[0m) " if hasArg(
-                "--DEBUG-SHOW-ID") else " "
-            self.__printer(f'[\x1b[33mDEBUG\x1b[0m@\x1b[34m{datetime.now().strftime("%T")}\x1b[0m]{idslot}[\x1b[32m{fn}\x1b[0m]%s' % (
-                f': {", ".join(map(str, args))}' if len(args) else ''))
+        if self.enabled:
+            # arguments are formatted right away, they may well change before the flush
+            _ring.append((time.time(), self.__printer, self.__idslot, fn,
+                          f': {", ".join(map(str, args))}' if len(args) else ''))
 
     def debugwrapper(self, start=1, end=None, fn_name=None):
         def wrapper(fn):
+            if not self.enabled:
+                # nothing to log, the method stays as it is
+                return fn
             xfn_name = fn_name or fn.__qualname__
 
             def underlayer(*args, **kwargs):
@@ -50,6 +115,7 @@ class LogDebugger:
                 return ret
             underlayer.__name__ = fn.__name__
             underlayer.__qualname__ = fn.__qualname__
+            underlayer.__module__ = fn.__module__
             return underlayer
         if callable(start):
             [start, fn] = [1, start]
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+
+"""
+                            rodio:
+Efficient non-blocking event loops for async concurrency and I/O
+          Think of this as AsyncIO on steroids
+"""
+
+import os
+import queue
+import pickle
+import select
+import time
+import struct
+import threading
+import collections
+import multiprocessing
+import multiprocessing.connection
+
+__all__ = ['PipeLanes', 'LocalLanes', 'RingLanes']
+
+
+class PipeLanes:
+    """
+    Priority lanes shared across processes, one JoinableQueue per lane
+    """
+
+    def __init__(self, count):
+        self._queues = [multiprocessing.JoinableQueue() for _ in range(count)]
+        # rung for ticks that bypass the queues, like those a lane spills to disk
+        self._doorbell = _Doorbell()
+
+    def __len__(self):
+        return len(self._queues)
+
+    def put(self, item, lane, block=True, timeout=None):
+        self._queues[lane].put(item)
+
+    def sizes(self):
+        return [queue.qsize() for queue in self._queues]
+
+    def qsize(self):
+        return sum(self.sizes())
+
+    def get(self, lane):
+        # only called for lanes with a positive qsize(), so this never blocks for long
+        queue = self._queues[lane]
+        item = queue.get()
+        queue.task_done()
+        return item
+
+    def wait(self, timeout):
+        ready = multiprocessing.connection.wait(
+            [self._doorbell._reader, *(queue._reader for queue in self._queues)], timeout)
+        if self._doorbell._reader in ready:
+            self._doorbell.drain()
+        return bool(ready)
+
+    def wake(self):
+        self._doorbell.ring()
+
+    def linger(self):
+        return False
+
+    def close(self):
+        pass
+
+
+class LocalLanes:
+    """
+    Priority lanes for threads within a single process
+    """
+
+    def __init__(self, count):
+        self._deques = [collections.deque() for _ in range(count)]
+        self._ready = threading.Condition(threading.Lock())
+        self._waiting = False
+
+    def __len__(self):
+        return len(self._deques)
+
+    def put(self, item, lane, block=True, timeout=None):
+        # deque appends are atomic, the condition only serves to wake a waiting consumer
+        self._deques[lane].append(item)
+        if self._waiting:
+            with self._ready:
+                self._ready.notify()
+
+    def sizes(self):
+        return [len(deque) for deque in self._deques]
+
+    def qsize(self):
+        return sum(self.sizes())
+
+    def get(self, lane):
+        return self._deques[lane].popleft()
+
+    def wait(self, timeout):
+        with self._ready:
+            # set before the emptiness check, so an append either shows up here or notifies
+            self._waiting = True
+            try:
+                return any(self._deques) or self._ready.wait(timeout)
+            finally:
+                self._waiting = False
+
+    def wake(self):
+        with self._ready:
+            self._ready.notify()
+
+    def linger(self):
+        return False
+
+    def close(self):
+        pass
+
+
+class _Doorbell:
+    # an eventfd where there's one, a pipe otherwise, inherited across forks
+    def __init__(self):
+        if hasattr(os, 'eventfd'):
+            self._reader = self._writer = os.eventfd(0, os.EFD_NONBLOCK)
+        else:
+            (self._reader, self._writer) = os.pipe()
+            os.set_blocking(self._reader, False)
+
+    def ring(self):
+        os.write(self._writer, (1).to_bytes(8, 'little'))
+
+    def drain(self):
+        try:
+            os.read(self._reader, 8 if self._reader == self._writer else 4096)
+        except BlockingIOError:
+            pass
+
+    def wait(self, timeout):
+        ready = select.select([self._reader], [], [], timeout)[0]
+        if ready:
+            self.drain()
+        return bool(ready)
+
+
+class RingLanes:
+    """
+    Priority lanes over rings of shared memory, one per lane, holding length-prefixed
+    serialized ticks. Producers write straight into the ring under a lock and only ring
+    the consumer's doorbell while it sleeps, no feeder thread or pipe write per tick
+    """
+
+    __HEADER = struct.Struct('<IB')
+    [__RAW, __PICKLED] = range(2)
+    # how long a consumer that just ran dry keeps looking before it goes to sleep
+    __LINGER = 200e-6
+    # per lane slots within the control array
+    [__HEAD, __TAIL, __COUNT] = range(3)
+    __SLOTS = 3
+    # how often a producer waiting for room checks that there's still a consumer to make it
+    __POLL = 0.1
+
+    def __init__(self, count, capacity):
+        self._capacity = capacity
+        # [head, tail, count] per lane as running byte offsets, then [consumer pid, closed, sleeping, waiting for room]
+        self._control = multiprocessing.RawArray('q', count * self.__SLOTS + 4)
+        self._consumer = None
+        self._rings = [memoryview(multiprocessing.RawArray(
+            'c', capacity)).cast('B') for _ in range(count)]
+        self._lock = multiprocessing.Condition(multiprocessing.Lock())
+        self._doorbell = _Doorbell()
+
+    def __len__(self):
+        return len(self._rings)
+
+    @property
+    def consumer(self):
+        # the consumer's (pid, thread id), it can't wait on itself for room in a full ring
+        return self._consumer
+
+    @consumer.setter
+    def consumer(self, consumer):
+        self._consumer = consumer
+        self._control[-4] = consumer[0]
+
+    def __consuming(self):
+        pid = self._control[-4]
+        if not pid or pid == os.getpid():
+            return True
+        # reaps finished children, a dead loop of our own would otherwise linger as a zombie
+        multiprocessing.active_children()
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+    def __encode(self, item):
+        if isinstance(item, bytes):
+            return self.__HEADER.pack(len(item), self.__RAW) + item
+        # blocks that carry shared memory references aren't bytes yet
+        data = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+        return self.__HEADER.pack(len(data), self.__PICKLED) + data
+
+    def __copy(self, ring, offset, data):
+        offset %= self._capacity
+        split = min(len(data), self._capacity - offset)
+        ring[offset:offset + split] = data[:split]
+        ring[:len(data) - split] = data[split:]
+
+    def __read(self, ring, offset, size):
+        offset %= self._capacity
+        split = min(size, self._capacity - offset)
+        return bytes(ring[offset:offset + split]) + bytes(ring[:size - split])
+
+    def put(self, item, lane, block=True, timeout=None):
+        record = self.__encode(item)
+        if len(record) > self._capacity:
+            raise RuntimeError(
+                f"a tick of {len(record)} bytes can't fit a ring of {self._capacity} bytes, raise <ring_size>")
+        control = self._control
+        base = lane * self.__SLOTS
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._capacity - (control[base + self.__TAIL] - control[base + self.__HEAD]) < len(record):
+                if control[-3] or not self.__consuming():
+                    raise RuntimeError(
+                        "Can't schedule executions on a stopped eventqueue")
+                remaining = self.__POLL if deadline is None else min(
+                    self.__POLL, deadline - time.monotonic())
+                if not block or remaining <= 0 or (os.getpid(), threading.get_ident()) == self.consumer:
+                    raise queue.Full("the ring for this lane is full")
+                control[-1] += 1
+                self._lock.wait(remaining)
+                control[-1] -= 1
+            self.__copy(self._rings[lane], control[base + self.__TAIL], record)
+            control[base + self.__TAIL] += len(record)
+            control[base + self.__COUNT] += 1
+            sleeping = control[-2]
+        if sleeping:
+            self._doorbell.ring()
+
+    def sizes(self):
+        control = self._control
+        return [control[lane * self.__SLOTS + self.__COUNT] for lane in range(len(self._rings))]
+
+    def qsize(self):
+        return sum(self.sizes())
+
+    def get(self, lane):
+        # only called for lanes with a positive size, by whoever holds the queue management lock
+        control = self._control
+        base = lane * self.__SLOTS
+        ring = self._rings[lane]
+        with self._lock:
+            head = control[base + self.__HEAD]
+            [size, kind] = self.__HEADER.unpack(
+                self.__read(ring, head, self.__HEADER.size))
+            data = self.__read(ring, head + self.__HEADER.size, size)
+            control[base + self.__HEAD] = head + self.__HEADER.size + size
+            control[base + self.__COUNT] -= 1
+            if control[-1]:
+                self._lock.notify_all()
+        return data if kind == self.__RAW else pickle.loads(data)
+
+    def wait(self, timeout):
+        control = self._control
+        with self._lock:
+            # flagged before the size check, so a put either shows up here or rings the bell
+            control[-2] = 1
+            if any(self.sizes()):
+                control[-2] = 0
+                return True
+        try:
+            self._doorbell.wait(timeout)
+        finally:
+            control[-2] = 0
+        return any(self.sizes())
+
+    def wake(self):
+        # unconditional, the consumer may be about to sleep without having seen the tick
+        self._doorbell.ring()
+
+    def linger(self):
+        # cheaper than the idle transition and doorbell a steady producer would otherwise cost per tick
+        deadline = time.perf_counter() + self.__LINGER
+        while time.perf_counter() < deadline:
+            if any(self.sizes()):
+                return True
+            os.sched_yield()
+        return False
+
+    def close(self):
+        # the queue ended, producers waiting for room won't ever get it
+        with self._lock:
+            self._control[-3] = 1
+            self._lock.notify_all()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+                            rodio:
+Efficient non-blocking event loops for async concurrency and I/O
+          Think of this as AsyncIO on steroids
+"""
+
+import sys
+import json
+import time
+import types
+import collections
+
+__all__ = ['TickProfiler']
+
+# recent samples kept per callable for its percentiles, totals cover every profiled call
+_WINDOW = 1024
+
+
+def _name(fn):
+    return f"{getattr(fn, '__module__', None) or '?'}.{getattr(fn, '__qualname__', None) or repr(fn)}"
+
+
+class _Record:
+    __slots__ = ('count', 'wall', 'cpu', 'walls', 'cpus')
+
+    def __init__(self):
+        self.count = self.wall = self.cpu = 0
+        self.walls = collections.deque(maxlen=_WINDOW)
+        self.cpus = collections.deque(maxlen=_WINDOW)
+
+    def add(self, wall, cpu):
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.walls.append(wall)
+        self.cpus.append(cpu)
+
+
+def _percentile(samples, share):
+    return samples[min(len(samples) - 1, int(len(samples) * share))] / 1000
+
+
+class TickProfiler:
+    """
+    Wall and CPU time per callable run by a loop, for one tick out of every `sample`
+    """
+
+    def __init__(self, sample=1):
+        self.sample = sample
+        self.__ticks = 0
+        self.__records = collections.defaultdict(_Record)
+
+    def sampled(self):
+        self.__ticks += 1
+        return self.__ticks % self.sample == 0
+
+    def call(self, fn, args):
+        [wall, cpu] = [time.perf_counter_ns(), time.thread_time_ns()]
+        try:
+            return fn(*args)
+        finally:
+            self.__records[_name(fn)].add(
+                time.perf_counter_ns() - wall, time.thread_time_ns() - cpu)
+
+    @types.coroutine
+    def meter(self, fn, coro):
+        # drives the coroutine itself, so it only gets charged the CPU time of its own
+        # steps and not that of whatever else the loop ran while it was suspended
+        [wall, cpu] = [time.perf_counter_ns(), 0]
+        [value, error] = [None, None]
+        try:
+            while True:
+                start = time.thread_time_ns()
+                try:
+                    yielded = coro.throw(error) if error else coro.send(value)
+                except StopIteration as e:
+                    return e.value
+                finally:
+                    cpu += time.thread_time_ns() - start
+                try:
+                    [value, error] = [(yield yielded), None]
+                except BaseException as e:
+                    [value, error] = [None, e]
+        finally:
+            self.__records[_name(fn)].add(time.perf_counter_ns() - wall, cpu)
+
+    def stats(self):
+        # times in milliseconds for totals and microseconds for percentiles
+        stats = {}
+        for (name, record) in self.__records.items():
+            [walls, cpus] = [sorted(record.walls), sorted(record.cpus)]
+            stats[name] = {
+                'count': record.count,
+                'wall_total_ms': record.wall / 1e6,
+                'wall_p50_us': _percentile(walls, 0.5),
+                'wall_p99_us': _percentile(walls, 0.99),
+                'cpu_total_ms': record.cpu / 1e6,
+                'cpu_p50_us': _percentile(cpus, 0.5),
+                'cpu_p99_us': _percentile(cpus, 0.99),
+            }
+        return stats
+
+    def dump(self, path=None, title=''):
+        stats = self.stats()
+        if path:
+            with open(path, 'w') as file:
+                json.dump({'sample': self.sample, 'callables': stats}, file, indent=2)
+            return
+        lines = [f"profile{f' of {title}' if title else ''}, one tick out of every {self.sample}",
+                 f"{'callable':<48} {'count':>8} {'wall ms':>10} {'p50 us':>9} {'p99 us':>9} {'cpu ms':>10} {'p50 us':>9} {'p99 us':>9}"]
+        for (name, entry) in sorted(stats.items(), key=lambda item: -item[1]['wall_total_ms']):
+            lines.append(f"{name[-48:]:<48} {entry['count']:>8} {entry['wall_total_ms']:>10.2f} {entry['wall_p50_us']:>9.1f} "
+                         f"{entry['wall_p99_us']:>9.1f} {entry['cpu_total_ms']:>10.2f} {entry['cpu_p50_us']:>9.1f} {entry['cpu_p99_us']:>9.1f}")
+        print('\n'.join(lines), file=sys.stderr)
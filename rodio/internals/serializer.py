@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+"""
+                            rodio:
+Efficient non-blocking event loops for async concurrency and I/O
+          Think of this as AsyncIO on steroids
+"""
+
+import io
+import os
+import types
+import pickle
+import threading
+
+__all__ = ['PickleSerializer',
+           'DillSerializer',
+           'CloudpickleSerializer',
+           'AutoSerializer',
+           'get_serializer']
+
+PROTOCOL = min(5, pickle.HIGHEST_PROTOCOL)
+
+
+# dill takes longer to import than the rest of rodio, it's only loaded once something needs it
+_dill = None
+# a loop forked while another thread is still importing dill would inherit its import lock held,
+# forks wait for the import to finish instead
+_loading = threading.Lock()
+os.register_at_fork(before=_loading.acquire,
+                    after_in_parent=_loading.release, after_in_child=_loading.release)
+
+
+def _get_dill():
+    global _dill
+    if _dill is None:
+        with _loading:
+            if _dill is None:
+                import dill
+                _dill = dill
+    return _dill
+
+
+def _collector(buffers):
+    return buffers.append if buffers is not None else None
+
+
+class PickleSerializer:
+    name = 'pickle'
+    # buffers passed to dumps() are filled with out-of-band PickleBuffers
+    out_of_band = True
+
+    def __init__(self, protocol=PROTOCOL):
+        self.protocol = protocol
+
+    def dumps(self, obj, buffers=None):
+        return pickle.dumps(obj, protocol=self.protocol, buffer_callback=_collector(buffers))
+
+    def loads(self, data, buffers=None):
+        return pickle.loads(data, buffers=buffers)
+
+
+class DillSerializer:
+    name = 'dill'
+    out_of_band = True
+
+    def dumps(self, obj, buffers=None):
+        if buffers is None:
+            return _get_dill().dumps(obj)
+        return _get_dill().dumps(obj, protocol=PROTOCOL, buffer_callback=buffers.append)
+
+    def loads(self, data, buffers=None):
+        return _get_dill().loads(data, buffers=buffers)
+
+
+class CloudpickleSerializer:
+    name = 'cloudpickle'
+    out_of_band = True
+
+    def __init__(self, protocol=PROTOCOL):
+        try:
+            import cloudpickle
+        except ImportError:
+            raise RuntimeError(
+                "the cloudpickle serializer requires the `cloudpickle` package to be installed") from None
+        self.protocol = protocol
+        self.__cloudpickle = cloudpickle
+
+    def dumps(self, obj, buffers=None):
+        return self.__cloudpickle.dumps(obj, protocol=self.protocol, buffer_callback=_collector(buffers))
+
+    def loads(self, data, buffers=None):
+        return pickle.loads(data, buffers=buffers)
+
+
+class _ReferencePickler(pickle.Pickler):
+    # stdlib pickle stores functions and classes by reference, which a forked
+    # loop can only resolve for objects defined in importable modules
+    def reducer_override(self, obj):
+        if isinstance(obj, type):
+            module = obj.__module__
+        else:
+            module = getattr(obj, '__module__', None) if callable(
+                obj) else type(obj).__module__
+        if module == '__main__':
+            raise pickle.PicklingError(
+                f"{obj!r} lives in __main__ and can't be pickled by reference")
+        return NotImplemented
+
+
+class AutoSerializer:
+    """
+    Uses stdlib pickle wherever it can and falls back to dill for lambdas,
+    closures and objects defined in `__main__`
+    """
+    name = 'auto'
+    out_of_band = True
+
+    __PICKLE = b'p'
+    __DILL = b'd'
+
+    def __init__(self, protocol=PROTOCOL):
+        self.protocol = protocol
+
+    def dumps(self, obj, buffers=None):
+        buffer = io.BytesIO()
+        buffer.write(self.__PICKLE)
+        mark = len(buffers) if buffers is not None else 0
+        try:
+            _ReferencePickler(buffer, protocol=self.protocol,
+                              buffer_callback=_collector(buffers)).dump(obj)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            if buffers is not None:
+                del buffers[mark:]
+                return self.__DILL + _get_dill().dumps(obj, protocol=self.protocol, buffer_callback=buffers.append)
+            return self.__DILL + _get_dill().dumps(obj)
+        return buffer.getvalue()
+
+    def loads(self, data, buffers=None):
+        (tag, data) = (data[:1], memoryview(data)[1:])
+        if tag == self.__PICKLE:
+            return pickle.loads(data, buffers=buffers)
+        elif tag == self.__DILL:
+            return _get_dill().loads(data, buffers=buffers)
+        raise RuntimeError(f"unknown serialization tag {tag!r}")
+
+
+serializers = {
+    'auto': AutoSerializer,
+    'pickle': PickleSerializer,
+    'dill': DillSerializer,
+    'cloudpickle': CloudpickleSerializer,
+}
+
+
+def get_serializer(spec=None):
+    if spec is None:
+        spec = 'auto'
+    if isinstance(spec, str):
+        if spec not in serializers:
+            raise RuntimeError(
+                f"unknown serializer {spec!r}, expected one of {', '.join(serializers)}")
+        return serializers[spec]()
+    # by name, whoever passes the dill module in has imported it already, nothing else should
+    if isinstance(spec, types.ModuleType) and spec.__name__ in ('pickle', 'dill'):
+        return serializers[spec.__name__]()
+    if not (callable(getattr(spec, 'dumps', None)) and callable(getattr(spec, 'loads', None))):
+        raise TypeError(
+            "serializer must be a name, or an object with `dumps` and `loads` methods")
+    return spec
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+"""
+                            rodio:
+Efficient non-blocking event loops for async concurrency and I/O
+          Think of this as AsyncIO on steroids
+"""
+
+import os
+import sys
+import pickle
+import secrets
+from multiprocessing import shared_memory, resource_tracker
+
+__all__ = ['wrap_args', 'export', 'attach', 'SegmentLease']
+
+BUFFER_TYPES = (bytes, bytearray, memoryview)
+
+# SharedMemory grew its `track` parameter in 3.13
+_UNTRACKED = sys.version_info >= (3, 13)
+
+
+def _create(name, size):
+    # segments are handed over to the consuming process, which unlinks them
+    # as soon as it has mapped them, so the creator must not track them
+    if _UNTRACKED:
+        return shared_memory.SharedMemory(name=name, create=True, size=size, track=False)
+    segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+    resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+def _attach(name):
+    if _UNTRACKED:
+        return shared_memory.SharedMemory(name=name, track=False)
+    # registered here and unregistered again by unlink()
+    return shared_memory.SharedMemory(name=name)
+
+
+def wrap_args(args, threshold):
+    """
+    Wrap large top-level bytes-like args in PickleBuffers so that they get
+    pickled out-of-band. Buffer-protocol objects like numpy arrays do this
+    by themselves under pickle protocol 5
+    """
+    if not any(isinstance(arg, BUFFER_TYPES) for arg in args):
+        return args
+    wrapped = []
+    for arg in args:
+        if isinstance(arg, BUFFER_TYPES):
+            view = memoryview(arg)
+            if view.contiguous and view.nbytes >= threshold:
+                arg = pickle.PickleBuffer(arg)
+        wrapped.append(arg)
+    return tuple(wrapped)
+
+
+def export(buffers, threshold):
+    """
+    Move out-of-band buffers at or above the threshold into fresh shared memory
+    segments, smaller ones are copied inline as bytes
+    """
+    refs = []
+    try:
+        for buffer in buffers:
+            raw = buffer.raw()
+            if raw.nbytes < threshold:
+                refs.append(bytes(raw))
+                continue
+            segment = _create(
+                f'rodio_{os.getpid()}_{secrets.token_hex(6)}', raw.nbytes)
+            try:
+                segment.buf[:raw.nbytes] = raw
+            finally:
+                segment.close()
+            refs.append((segment.name, raw.nbytes))
+    except:
+        discard(refs)
+        raise
+    return refs
+
+
+def discard(refs):
+    for ref in refs:
+        if isinstance(ref, tuple):
+            try:
+                _attach(ref[0]).unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SegmentLease:
+    def __init__(self):
+        self.__segments = []
+
+    def attach(self, ref):
+        if not isinstance(ref, tuple):
+            return ref
+        [name, size] = ref
+        segment = _attach(name)
+        # the mapping outlives the name, nothing else needs to find it now
+        segment.unlink()
+        view = segment.buf[:size]
+        self.__segments.append([segment, view])
+        return view
+
+    def release(self):
+        """
+        Unmap every segment no longer referenced, returns False while some
+        views are still held onto by the callables that received them
+        """
+        held = []
+        for [segment, view] in self.__segments:
+            try:
+                view.release()
+                segment.close()
+            except BufferError:
+                held.append([segment, view])
+        self.__segments = held
+        return not held
+
+
+def attach(refs):
+    lease = SegmentLease()
+    return [[lease.attach(ref) for ref in refs], lease]
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+"""
+                            rodio:
+Efficient non-blocking event loops for async concurrency and I/O
+          Think of this as AsyncIO on steroids
+"""
+
+import os
+import mmap
+import pickle
+import struct
+import secrets
+import tempfile
+import multiprocessing
+
+__all__ = ['SpillLanes']
+
+_HEADER = struct.Struct('<IB')
+[_RAW, _PICKLED, _END] = range(3)
+
+# per lane slots within the control array
+[_SPILLING, _WSEQ, _WOFF, _WSIZE, _RSEQ, _ROFF, _RECORDS, _BYTES] = range(8)
+_SLOTS = 8
+
+# how much of a segment a lane that caught up may have used and still rewind it rather than drop it
+_REWIND = 1 << 20
+
+# slots after the per lane ones
+[_MEMORY, _SPILLED_BYTES, _SPILLED_TICKS, _SEGMENTS, _SEGMENTS_TOTAL] = range(5)
+
+
+class SpillLanes:
+    """
+    Wraps another set of lanes, appending ticks to memory-mapped segment files on disk
+    once the ticks held in memory outgrow a threshold. A lane that has started spilling
+    keeps spilling until the consumer has read everything back, which keeps it in order
+    """
+
+    def __init__(self, inner, threshold, directory=None, segment_size=64 << 20, footprint=len):
+        self._inner = inner
+        self._threshold = threshold
+        self._directory = directory or tempfile.gettempdir()
+        self._segment_size = segment_size
+        self._footprint = footprint
+        self._token = f'{os.getpid()}-{secrets.token_hex(4)}'
+        self._control = multiprocessing.RawArray('q', len(inner) * _SLOTS + 5)
+        for lane in range(len(inner)):
+            self._control[lane * _SLOTS + _WSEQ] = -1
+        self._lock = multiprocessing.Lock()
+        # this process' mappings, (seq, mmap) per lane
+        self.__writing = {}
+        self.__reading = {}
+
+    def __len__(self):
+        return len(self._inner)
+
+    @property
+    def consumer(self):
+        return self._inner.consumer
+
+    @consumer.setter
+    def consumer(self, consumer):
+        self._inner.consumer = consumer
+
+    def __path(self, lane, seq):
+        return os.path.join(self._directory, f'rodio-spill-{self._token}-{lane}-{seq}.seg')
+
+    def __stat(self, slot):
+        return self._control[len(self._inner) * _SLOTS + slot]
+
+    def __bump(self, slot, delta):
+        self._control[len(self._inner) * _SLOTS + slot] += delta
+
+    def put(self, item, lane, block=True, timeout=None):
+        size = self._footprint(item)
+        base = lane * _SLOTS
+        control = self._control
+        with self._lock:
+            spill = control[base + _SPILLING] or self.__stat(_MEMORY) + size > self._threshold
+            if spill:
+                control[base + _SPILLING] = 1
+                self.__append(lane, item)
+            else:
+                self.__bump(_MEMORY, size)
+        if spill:
+            # the inner lanes never saw this tick, nothing else wakes an idle consumer
+            self._inner.wake()
+            return
+        try:
+            self._inner.put(item, lane, block, timeout)
+        except:
+            with self._lock:
+                self.__bump(_MEMORY, -size)
+            raise
+
+    def __append(self, lane, item):
+        if isinstance(item, bytes):
+            record = _HEADER.pack(len(item), _RAW) + item
+        else:
+            # blocks carrying shared memory references, those segments stay where they are
+            data = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+            record = _HEADER.pack(len(data), _PICKLED) + data
+        base = lane * _SLOTS
+        control = self._control
+        if control[base + _WSEQ] < 0 or control[base + _WOFF] + len(record) > control[base + _WSIZE]:
+            self.__rollover(lane, len(record))
+        segment = self.__map(self.__writing, lane, control[base + _WSEQ])
+        offset = control[base + _WOFF]
+        segment[offset:offset + len(record)] = record
+        control[base + _WOFF] = offset + len(record)
+        control[base + _RECORDS] += 1
+        control[base + _BYTES] += len(record)
+        self.__bump(_SPILLED_BYTES, len(record))
+        self.__bump(_SPILLED_TICKS, 1)
+
+    def __rollover(self, lane, needed):
+        base = lane * _SLOTS
+        control = self._control
+        if control[base + _WSEQ] >= control[base + _RSEQ] and control[base + _WSIZE] - control[base + _WOFF] >= _HEADER.size:
+            # tells the reader to move on to the next segment
+            segment = self.__map(self.__writing, lane, control[base + _WSEQ])
+            offset = control[base + _WOFF]
+            segment[offset:offset + _HEADER.size] = _HEADER.pack(0, _END)
+        seq = control[base + _WSEQ] + 1
+        size = max(self._segment_size, needed + _HEADER.size)
+        fd = os.open(self.__path(lane, seq), os.O_RDWR |
+                     os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            os.ftruncate(fd, size)
+        finally:
+            os.close(fd)
+        control[base + _WSEQ] = seq
+        control[base + _WOFF] = 0
+        control[base + _WSIZE] = size
+        self.__bump(_SEGMENTS, 1)
+        self.__bump(_SEGMENTS_TOTAL, 1)
+
+    def __map(self, cache, lane, seq):
+        [cached, segment] = cache.get(lane, (None, None))
+        if cached != seq:
+            if segment is not None:
+                segment.close()
+            fd = os.open(self.__path(lane, seq), os.O_RDWR)
+            try:
+                segment = mmap.mmap(fd, os.fstat(fd).st_size)
+            finally:
+                os.close(fd)
+            cache[lane] = (seq, segment)
+        return segment
+
+    def __release(self, lane, seq):
+        [cached, segment] = self.__reading.pop(lane, (None, None))
+        if segment is not None:
+            segment.close()
+        try:
+            os.unlink(self.__path(lane, seq))
+        except FileNotFoundError:
+            pass
+        self.__bump(_SEGMENTS, -1)
+
+    def sizes(self):
+        control = self._control
+        return [size + control[lane * _SLOTS + _RECORDS] for (lane, size) in enumerate(self._inner.sizes())]
+
+    def qsize(self):
+        return sum(self.sizes())
+
+    def get(self, lane):
+        # ticks held in memory were all queued before the lane started spilling
+        if self._inner.sizes()[lane]:
+            item = self._inner.get(lane)
+            with self._lock:
+                self.__bump(_MEMORY, -self._footprint(item))
+            return item
+        with self._lock:
+            return self.__unspill(lane)
+
+    def __unspill(self, lane):
+        base = lane * _SLOTS
+        control = self._control
+        while True:
+            seq = control[base + _RSEQ]
+            segment = self.__map(self.__reading, lane, seq)
+            offset = control[base + _ROFF]
+            if offset + _HEADER.size <= len(segment):
+                [size, kind] = _HEADER.unpack(
+                    segment[offset:offset + _HEADER.size])
+                if kind != _END:
+                    break
+            self.__release(lane, seq)
+            control[base + _RSEQ] = seq + 1
+            control[base + _ROFF] = 0
+        data = segment[offset + _HEADER.size:offset + _HEADER.size + size]
+        control[base + _ROFF] = offset + _HEADER.size + size
+        control[base + _RECORDS] -= 1
+        control[base + _BYTES] -= _HEADER.size + size
+        if not control[base + _RECORDS]:
+            # caught up, let the lane go back to memory
+            if control[base + _WOFF] <= _REWIND:
+                # a short spill, the next one reuses the segment rather than pay for a new file
+                control[base + _ROFF] = control[base + _WOFF] = 0
+            else:
+                self.__release(lane, seq)
+                control[base + _RSEQ] = seq + 1
+                control[base + _ROFF] = 0
+                control[base + _WSIZE] = 0
+            control[base + _SPILLING] = 0
+        return data if kind == _RAW else pickle.loads(data)
+
+    def wait(self, timeout):
+        if any(self._control[lane * _SLOTS + _RECORDS] for lane in range(len(self._inner))):
+            return True
+        return self._inner.wait(timeout)
+
+    def wake(self):
+        self._inner.wake()
+
+    def linger(self):
+        return self._inner.linger()
+
+    def close(self):
+        self._inner.close()
+
+    def stats(self):
+        control = self._control
+        return {
+            'spilling': [bool(control[lane * _SLOTS + _SPILLING]) for lane in range(len(self._inner))],
+            'memory_bytes': self.__stat(_MEMORY),
+            'spilled_bytes': self.__stat(_SPILLED_BYTES),
+            'spilled_ticks': self.__stat(_SPILLED_TICKS),
+            'pending_bytes': sum(control[lane * _SLOTS + _BYTES] for lane in range(len(self._inner))),
+            'pending_ticks': sum(control[lane * _SLOTS + _RECORDS] for lane in range(len(self._inner))),
+            'segments': self.__stat(_SEGMENTS),
+            'segments_total': self.__stat(_SEGMENTS_TOTAL),
+        }
+
+    def discard(self):
+        # unlinks every segment still on disk, the queue won't be read from again
+        with self._lock:
+            control = self._control
+            for lane in range(len(self._inner)):
+                base = lane * _SLOTS
+                for seq in range(control[base + _RSEQ], control[base + _WSEQ] + 1):
+                    try:
+                        os.unlink(self.__path(lane, seq))
+                    except FileNotFoundError:
+                        continue
+                    self.__bump(_SEGMENTS, -1)
+                control[base + _RSEQ] = control[base + _WSEQ] + 1
+                control[base + _RECORDS] = control[base + _BYTES] = 0
@@ -6,8 +6,34 @@ Efficient non-blocking event loops for async concurrency and I/O
           Think of this as AsyncIO on steroids
 """
 
-import uvloop
-
-uvloop.install()
+import asyncio
 
 __all__ = []
+
+
+def new_event_loop():
+    # uvloop is only imported once a loop actually runs, and only drives that loop
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.new_event_loop()
+    return uvloop.new_event_loop()
+
+
+def run(main):
+    # asyncio.run() on a uvloop loop, without installing uvloop's policy process-wide
+    loop = new_event_loop()
+    try:
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                # gather() picks the tasks' loop, this one was never made the current loop
+                loop.run_until_complete(asyncio.gather(
+                    *tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
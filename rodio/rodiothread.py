@@ -18,6 +18,8 @@ corelogger = LogDebugger("rodiocore.rodiothread")
 
 
 class RodioThread(threading.Thread, EventEmitter):
+    exitcode = None
+
     @corelogger.debugwrapper
     def __init__(self, target, *, name=None, args=(), kwargs=None, daemon=None, killswitch=None):
         super(RodioThread, self).__init__(target=target,
@@ -30,11 +32,44 @@ class RodioThread(threading.Thread, EventEmitter):
         self._ended = threading.Event()
         self.set_name(name or self.name)
 
+    def __repr__(self):
+        status = []
+        if self.started():
+            status.append("started")
+        if self.is_alive():
+            status.append("alive")
+        elif self.started():
+            exitcode = self.exitcode
+            status.append(
+                f"stopped{f' [exitcode = {exitcode}]' if isinstance(exitcode, (int, float)) else ''}")
+        status.append("daemon") if self.is_daemon() else None
+        return '<%s(%s, %s)>' % (type(self).__name__, self.name, ", ".join(status))
+
     @corelogger.debugwrapper
     def start(self):
         super(RodioThread, self).start()
         self.emit('start')
 
+    def run(self):
+        # threads swallow SystemExit, keep its code around like a process would
+        try:
+            super(RodioThread, self).run()
+        except SystemExit as e:
+            self.exitcode = e.code if isinstance(
+                e.code, int) else int(e.code is not None)
+        except:
+            self.exitcode = 1
+            raise
+        else:
+            self.exitcode = 0
+
+    def _pre_exit(self):
+        if self.ended():
+            raise RuntimeError("thread already ended")
+        if not self.started():
+            raise RuntimeError("can't end a thread before it starts")
+        self.emit('beforeExit')
+
     @corelogger.debugwrapper
     def stop(self):
         if self.ended():
@@ -45,6 +80,16 @@ class RodioThread(threading.Thread, EventEmitter):
         self._ended.set()
         self.emit('exit')
 
+    # threads can't be signalled, they get stopped at their next tick instead
+    terminate = stop
+    kill = stop
+
+    def __unpausable(self):
+        raise RuntimeError(
+            "threads can't be suspended, pause the event queue instead")
+
+    pause = halt = resume = __unpausable
+
     @corelogger.debugwrapper
     def set_name(self, name):
         if not (name and isinstance(name, str)):
@@ -76,15 +121,24 @@ class RodioThread(threading.Thread, EventEmitter):
     isDaemon = is_daemon
 
     def started(self):
-        return self.is_alive()
+        # threading.Thread's own flag, set once the thread begins running
+        return self._started.is_set()
 
     has_started = started
 
     def ended(self):
-        return self._ended.is_set()
+        return (self.started() and not self.is_alive()) or self._ended.is_set()
 
     has_ended = ended
 
+    def is_active(self):
+        return self.is_alive() and not self.ended()
+
+    def paused(self):
+        return False
+
+    has_paused = paused
+
 
 def get_current_thread():
     return threading.current_thread()
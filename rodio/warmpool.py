@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""
+                            rodio:
+Efficient non-blocking event loops for async concurrency and I/O
+          Think of this as AsyncIO on steroids
+"""
+
+import collections
+import importlib
+import threading
+from .eventloop import EventLoop, get_running_loop, PRIORITY_HIGH
+from .internals.debug import LogDebugger
+from node_events import EventEmitter
+
+__all__ = ['WarmPool']
+
+corelogger = LogDebugger("rodiocore.warmpool")
+
+
+def _rename(name):
+    # runs within the spare, so its own view of the process carries the new name too
+    get_running_loop().set_name(name)
+
+
+class WarmPool(EventEmitter):
+    """
+    Keeps started, idle EventLoops around to hand over without waiting on a fork
+    """
+
+    @corelogger.debugwrapper
+    def __init__(self, size=2, *, name=None, preload=(), refill_delay=0.05, **options):
+        super(WarmPool, self).__init__()
+        if not (isinstance(size, int) and size > 0):
+            raise RuntimeError("<size> parameter must be a positive int")
+        if 'autostart' in options or 'block' in options:
+            raise RuntimeError(
+                "spares are started by the pool, <autostart> and <block> can't be set on them")
+        if not (isinstance(refill_delay, (int, float)) and refill_delay >= 0):
+            raise RuntimeError(
+                "<refill_delay> parameter must be a non-negative number")
+        self._name = name or 'RodioWarmPool'
+        self.__size = size
+        self.__refill_delay = refill_delay
+        self.__options = options
+        self.__closed = False
+        self.__counter = 0
+        self.__spares = collections.deque()
+        self.__refilled = threading.Condition()
+        self.__refiller = None
+        # imported here, every spare forked from this process inherits them
+        self.preloaded = [importlib.import_module(
+            module) for module in preload]
+        self.__refill(delay=0)
+
+    def __repr__(self):
+        status = [f"spares = {len(self.__spares)}/{self.__size}"]
+        if self.__closed:
+            status.append("closed")
+        return '<%s(%s, %s)>' % (type(self).__name__, self._name, ", ".join(status))
+
+    def __spawn(self):
+        self.__counter += 1
+        loop = EventLoop(f'{self._name}-spare{self.__counter}',
+                         autostart=False, **self.__options)
+        loop.start()
+        return loop
+
+    def __refill(self, delay=None):
+        delay = self.__refill_delay if delay is None else delay
+        while len(self.__spares) < self.__size and not self.__closed:
+            # a fork and a new loop's setup hog the GIL, give a loop just handed
+            # over its first ticks first unless there's no spare left at all
+            if self.__spares and delay:
+                with self.__refilled:
+                    self.__refilled.wait(delay)
+                if self.__closed:
+                    break
+            loop = self.__spawn()
+            with self.__refilled:
+                self.__spares.append(loop)
+                self.__refilled.notify()
+
+    def __refillInBackground(self):
+        # forks happen off the caller's critical path, one refiller at a time
+        if not (self.__refiller and self.__refiller.is_alive()):
+            self.__refiller = threading.Thread(
+                target=self.__refill, name=f'{self._name}Refiller', daemon=True)
+            self.__refiller.start()
+
+    @corelogger.debugwrapper
+    def acquire(self, name=None, *, timeout=None):
+        if self.__closed:
+            raise RuntimeError("Can't acquire a loop from a closed WarmPool")
+        with self.__refilled:
+            # spares that died while waiting are dropped, not handed over
+            while True:
+                while not self.__spares:
+                    self.__refillInBackground()
+                    if not self.__refilled.wait(timeout):
+                        raise TimeoutError(
+                            "no spare EventLoop became available in time")
+                loop = self.__spares.popleft()
+                if not loop.ended():
+                    break
+        self.__refillInBackground()
+        if name:
+            loop.set_name(name)
+            loop.nextTick(_rename, name, priority=PRIORITY_HIGH)
+        self.emit('acquire', loop)
+        return loop
+
+    def spares(self):
+        return len(self.__spares)
+
+    @corelogger.debugwrapper
+    def close(self):
+        if self.__closed:
+            return
+        self.__closed = True
+        self.emit('close')
+        with self.__refilled:
+            self.__refilled.notify_all()
+        if self.__refiller:
+            self.__refiller.join()
+        while self.__spares:
+            loop = self.__spares.popleft()
+            if not (loop.ended() or loop.end_is_queued()):
+                loop.scheduleExit()
+            loop.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ttype, value, traceback):
+        self.close()
+        return ttype is None
@@ -13,8 +13,10 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     license='Apache-2.0',
     url="https://github.com/miraclx/node-buffer",
-    packages=['rodio', 'rodio.internals'],
+    packages=['rodio', 'rodio.internals', 'rodio.bench'],
     install_requires=['node-events', 'uvloop', 'dill'],
+    # shared memory segments and out-of-band pickling
+    python_requires='>=3.8',
     classifiers=[
         "Operating System :: OS Independent",
         "Programming Language :: Python :: 3",